@@ -44,11 +44,15 @@ class DetectionThread(threading.Thread):
         self.base_interval = base_interval
         self.battery_fn = battery_fn or self._default_battery_fn
         self._stop_event = threading.Event()
+        # Set once run() has entered its loop; lets callers wait for startup without sleeping.
+        # (Not "_started": threading.Thread already uses that name internally.)
+        self._loop_started = threading.Event()
 
     def stop(self) -> None:
         self._stop_event.set()
 
     def run(self) -> None:
+        self._loop_started.set()
         while not self._stop_event.is_set():
             start_time = time.monotonic()
             payload = self._run_detection()
@@ -11,16 +11,18 @@ Responsibilities:
 from __future__ import annotations
 
 import logging
+import queue
+import threading
 from dataclasses import dataclass
+from fractions import Fraction
 from pathlib import Path
-from typing import Dict, List, Mapping, Sequence, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple, Union
 
 import numpy as np
 import tensorflow as tf
 import tensorflow_hub as hub
-import torch
-import torchaudio
 import yaml
+from scipy.signal import resample_poly
 
 from ai.ai_runtime.utils.paths import get_config_path, get_yamnet_saved_model_path
 
@@ -29,6 +31,74 @@ logger = logging.getLogger(__name__)
 YAMNET_SAMPLE_RATE = 16000
 DEFAULT_CLASS_MAP_PATH = get_config_path("yamnet_class_map.yaml")
 DEFAULT_MODEL_HANDLE = "https://tfhub.dev/google/yamnet/1"
+YAMNET_NUM_CLASSES = 521
+
+# libyaml-backed loader when PyYAML was built with it; same semantics as safe_load
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# resolved path -> (mtime_ns, parsed class-map YAML), shared across detector instances.
+# One entry per file: an edited map replaces its stale parse instead of adding another.
+_CLASS_MAP_CACHE: Dict[str, Tuple[int, dict]] = {}
+
+
+class _CategoryRing:
+    """
+    Fixed-size per-category history stored as one (categories, window) array.
+
+    Each category owns a row and its own write position, so categories that first
+    appear mid-stream start with an empty history (rows are pre-filled with ``fill``).
+    """
+
+    def __init__(self, window_size: int, dtype: np.dtype, fill: Union[bool, float]) -> None:
+        self.window_size = window_size
+        self._fill = fill
+        self.rows: Dict[str, int] = {}
+        self.buf = np.full((0, window_size), fill, dtype=dtype)
+        self.pos = np.zeros(0, dtype=np.intp)
+
+    def push(self, categories: Sequence[str], values: np.ndarray) -> np.ndarray:
+        """Write one value per category at its ring position; returns the row indices."""
+        rows = np.fromiter((self._row(c) for c in categories), dtype=np.intp, count=len(categories))
+        pos = self.pos[rows]
+        self.buf[rows, pos] = values
+        self.pos[rows] = (pos + 1) % self.window_size
+        return rows
+
+    def _row(self, category: str) -> int:
+        row = self.rows.get(category)
+        if row is None:
+            row = self.rows[category] = len(self.rows)
+            if row >= len(self.buf):
+                grow = max(8, len(self.buf))
+                self.buf = np.concatenate(
+                    (self.buf, np.full((grow, self.window_size), self._fill, dtype=self.buf.dtype))
+                )
+                self.pos = np.concatenate((self.pos, np.zeros(grow, dtype=np.intp)))
+        return row
+
+
+class _FrameRing:
+    """
+    History of a fixed-order category vector stored as one (window, categories) array.
+
+    Used by the ``*_vec`` paths, where every frame carries every category, so a
+    single write position is shared. A change in vector length restarts the history.
+    """
+
+    def __init__(self, window_size: int, dtype: np.dtype, fill: Union[bool, float]) -> None:
+        self.window_size = window_size
+        self._dtype = dtype
+        self._fill = fill
+        self.buf = np.full((window_size, 0), fill, dtype=dtype)
+        self.pos = 0
+
+    def push(self, values: np.ndarray) -> np.ndarray:
+        """Write one frame and return the full (window, categories) history."""
+        if self.buf.shape[1] != values.shape[0]:
+            self.buf = np.full((self.window_size, values.shape[0]), self._fill, dtype=self._dtype)
+            self.pos = 0
+        self.buf[self.pos] = values
+        self.pos = (self.pos + 1) % self.window_size
+        return self.buf
 
 
 class ConfidenceBuffer:
@@ -43,19 +113,22 @@ class ConfidenceBuffer:
     def __init__(self, window_size: int = 3, threshold: float = 0.5) -> None:
         self.window_size = window_size
         self.threshold = threshold
-        self.history: Dict[str, List[bool]] = {}
+        self._ring = _CategoryRing(window_size, np.bool_, False)
+        self._vec_ring = _FrameRing(window_size, np.bool_, False)
 
     def update(self, detections: Mapping[str, float]) -> Dict[str, bool]:
-        stable: Dict[str, bool] = {}
-        for category, confidence in detections.items():
-            if category not in self.history:
-                self.history[category] = []
-            self.history[category].append(confidence > self.threshold)
-            if len(self.history[category]) > self.window_size:
-                self.history[category].pop(0)
-            hits = sum(self.history[category])
-            stable[category] = hits >= (self.window_size + 1) // 2
-        return stable
+        categories = list(detections)
+        if not categories:
+            return {}
+        confidences = np.fromiter(detections.values(), dtype=np.float64, count=len(categories))
+        rows = self._ring.push(categories, confidences > self.threshold)
+        hits = self._ring.buf[rows].sum(axis=1)
+        return dict(zip(categories, (hits >= (self.window_size + 1) // 2).tolist()))
+
+    def update_vec(self, confidences: np.ndarray) -> np.ndarray:
+        """Vector form of :meth:`update` for a fixed category order; returns a bool array."""
+        history = self._vec_ring.push(confidences > self.threshold)
+        return history.sum(axis=0) >= (self.window_size + 1) // 2
 
 
 class SchmittTrigger:
@@ -71,6 +144,7 @@ class SchmittTrigger:
         self.on_threshold = on_threshold
         self.off_threshold = off_threshold
         self.active: Dict[str, bool] = {}
+        self._active_vec = np.zeros(0, dtype=bool)
 
     def update(self, category: str, confidence: float) -> bool:
         currently_on = self.active.get(category, False)
@@ -81,24 +155,39 @@ class SchmittTrigger:
             self.active[category] = True
         return self.active.get(category, False)
 
+    def update_vec(self, confidences: np.ndarray) -> np.ndarray:
+        """Vector form of :meth:`update` for a fixed category order; returns a bool array."""
+        if self._active_vec.shape != confidences.shape:
+            self._active_vec = np.zeros(confidences.shape, dtype=bool)
+        self._active_vec = np.where(
+            self._active_vec, confidences >= self.off_threshold, confidences > self.on_threshold
+        )
+        return self._active_vec
+
 
 class MedianSmoother:
     """Median filter over recent frames for extra stability."""
 
     def __init__(self, window_size: int = 3) -> None:
         self.window_size = window_size
-        self.history: Dict[str, List[float]] = {}
+        # NaN marks slots not yet written, so warm-up medians use only real frames
+        self._ring = _CategoryRing(window_size, np.float64, np.nan)
+        self._vec_ring = _FrameRing(window_size, np.float64, np.nan)
 
     def smooth(self, detections: Mapping[str, float]) -> Dict[str, float]:
-        smoothed: Dict[str, float] = {}
-        for category, confidence in detections.items():
-            if category not in self.history:
-                self.history[category] = []
-            self.history[category].append(confidence)
-            if len(self.history[category]) > self.window_size:
-                self.history[category].pop(0)
-            smoothed[category] = float(np.median(self.history[category]))
-        return smoothed
+        categories = list(detections)
+        if not categories:
+            return {}
+        confidences = np.fromiter(detections.values(), dtype=np.float64, count=len(categories))
+        rows = self._ring.push(categories, confidences)
+        window = self._ring.buf[rows]
+        medians = np.nanmedian(window, axis=1) if np.isnan(window).any() else np.median(window, axis=1)
+        return dict(zip(categories, medians.tolist()))
+
+    def smooth_vec(self, confidences: np.ndarray) -> np.ndarray:
+        """Vector form of :meth:`smooth` for a fixed category order."""
+        window = self._vec_ring.push(confidences)
+        return np.nanmedian(window, axis=0) if np.isnan(window).any() else np.median(window, axis=0)
 
 
 class AdaptiveDutyCycle:
@@ -134,6 +223,7 @@ class SemanticDetective:
         class_map_path: Path = DEFAULT_CLASS_MAP_PATH,
         model_handle: str = DEFAULT_MODEL_HANDLE,
         enable_median: bool = False,
+        jit_compile: bool = False,
     ) -> None:
         self.class_map_path = class_map_path
         self.model_handle = model_handle
@@ -146,79 +236,165 @@ class SemanticDetective:
         else:
             logger.info("Loading YAMNet from %s...", self.model_handle)
             self.model = hub.load(self.model_handle)
+        self._yamnet_fn = self._compile_yamnet(jit_compile)
         self.categories = self._load_class_map(class_map_path)
 
         self.conf_buffer = ConfidenceBuffer()
         self.schmitt = SchmittTrigger()
         self.median = MedianSmoother() if enable_median else None
-        self._resampler_cache = {}
+        # sample_rate -> (up, down) polyphase factors for resample_poly
+        self._resample_ratios: Dict[int, Tuple[int, int]] = {}
 
     def classify(self, audio: np.ndarray, sample_rate: int) -> Dict[str, Mapping[str, Union[float, bool]]]:
-        waveform = self._prepare_audio(audio, sample_rate)
-        scores, _, _ = self.model(waveform)
+        return self._classify_waveform(self._prepare_audio(audio, sample_rate))
+
+    def classify_stream(
+        self, chunks: Iterable[np.ndarray], sample_rate: int
+    ) -> Iterator[Dict[str, Mapping[str, Union[float, bool]]]]:
+        """
+        Classify a stream of chunks, yielding one ``classify`` result per chunk.
+
+        A worker thread prepares (downmixes/resamples) the next chunks while the
+        caller's thread runs YAMNet, so resampling overlaps inference. At most two
+        prepared chunks are buffered.
+        """
+        ready: "queue.Queue[object]" = queue.Queue(maxsize=2)
+        stop = threading.Event()
+        done = object()
+
+        def offer(item: object) -> bool:
+            # Bounded puts, so a producer whose consumer has gone notices `stop`
+            while not stop.is_set():
+                try:
+                    ready.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            try:
+                for chunk in chunks:
+                    if not offer(self._prepare_audio(chunk, sample_rate)):
+                        return
+                item = done
+            except Exception as exc:  # re-raised in the consumer
+                item = exc
+            offer(item)
+
+        worker = threading.Thread(target=produce, name="yamnet-prepare", daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = ready.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield self._classify_waveform(item)
+        finally:
+            stop.set()
+            # Free a producer blocked on a full queue. One blocked inside next(chunks)
+            # (e.g. a live microphone) can't be interrupted; it is a daemon, so don't wait on it.
+            while True:
+                try:
+                    ready.get_nowait()
+                except queue.Empty:
+                    break
+            worker.join(timeout=0.2)
+
+    def _classify_waveform(self, waveform: tf.Tensor) -> Dict[str, Mapping[str, Union[float, bool]]]:
+        scores, _, _ = self._yamnet_fn(waveform)
         max_scores = tf.reduce_max(scores, axis=0)
-        mapped = self._map_to_categories(max_scores)
 
-        smoothed = self.median.smooth(mapped) if self.median else mapped
-        stable = self.conf_buffer.update(smoothed)
-        states = {cat: self.schmitt.update(cat, smoothed[cat]) for cat in smoothed}
+        # The class map fixes the category order, so the whole smoothing chain runs on
+        # vectors and the per-category dicts are built once at the end.
+        raw = self._category_vector(max_scores)
+        smoothed = self.median.smooth_vec(raw) if self.median else raw
+        stable = self.conf_buffer.update_vec(smoothed)
+        states = self.schmitt.update_vec(smoothed)
 
+        names = self._category_names
+        mapped = dict(zip(names, raw.tolist()))
         return {
             "raw": mapped,
-            "smoothed": smoothed,
-            "stable": stable,
-            "states": states,
+            "smoothed": dict(zip(names, smoothed.tolist())) if self.median else mapped,
+            "stable": dict(zip(names, stable.tolist())),
+            "states": dict(zip(names, states.tolist())),
         }
 
+    def _compile_yamnet(self, jit_compile: bool):
+        """Wrap YAMNet in one traced graph and trigger compilation.
+
+        XLA is opt-in: it specialises on the concrete input length, so callers with
+        variable-size buffers would pay a recompile for every new length.
+        """
+        signature = [tf.TensorSpec([None], tf.float32)]
+        warm_up = tf.zeros([YAMNET_SAMPLE_RATE], dtype=tf.float32)
+        for use_xla in ((True, False) if jit_compile else (False,)):
+            fn = tf.function(self.model, jit_compile=use_xla, input_signature=signature)
+            try:
+                fn(warm_up)
+                return fn
+            except Exception as exc:
+                logger.warning("YAMNet tf.function (jit_compile=%s) failed: %s", use_xla, exc)
+        logger.warning("Falling back to eager YAMNet calls")
+        return self.model
+
     def get_top_detections(self, scores: Mapping[str, float], n: int = 3) -> List[Tuple[str, float]]:
         sorted_pairs = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
         return sorted_pairs[:n]
 
     def _prepare_audio(self, audio: np.ndarray, sample_rate: int) -> tf.Tensor:
+        # Stay in float32 NumPy end to end; TF sees exactly one contiguous buffer.
+        audio = np.asarray(audio, dtype=np.float32)
         if audio.size == 0:
             raise ValueError("Audio buffer is empty.")
 
         if audio.ndim == 2:
-            audio_mono = np.mean(audio, axis=1)
+            audio_mono = audio.mean(axis=1, dtype=np.float32)
         elif audio.ndim == 1:
             audio_mono = audio
         else:
             raise ValueError("Audio must be 1D or 2D (samples[, channels]).")
 
         if sample_rate != YAMNET_SAMPLE_RATE:
-            if sample_rate not in self._resampler_cache:
-                self._resampler_cache[sample_rate] = torchaudio.transforms.Resample(
-                    orig_freq=sample_rate,
-                    new_freq=YAMNET_SAMPLE_RATE,
-                )
-            torch_audio = torch.from_numpy(audio_mono).to(torch.float32)
-            torch_resampled = self._resampler_cache[sample_rate](torch_audio)
-            audio_mono = torch_resampled.numpy()
+            ratio = self._resample_ratios.get(sample_rate)
+            if ratio is None:
+                frac = Fraction(YAMNET_SAMPLE_RATE, sample_rate).limit_denominator(1000)
+                ratio = self._resample_ratios[sample_rate] = (frac.numerator, frac.denominator)
+            # Polyphase FIR (upfirdn): no FFT buffer and no slow path for prime lengths
+            audio_mono = resample_poly(audio_mono, *ratio).astype(np.float32, copy=False)
 
-        return tf.convert_to_tensor(audio_mono, dtype=tf.float32)
+        return tf.convert_to_tensor(np.ascontiguousarray(audio_mono))
 
     def _map_to_categories(self, yamnet_scores: tf.Tensor) -> Dict[str, float]:
-        scores_np = yamnet_scores.numpy()
-        outputs: Dict[str, float] = {}
-        for category, cfg in self.categories.items():
-            if not cfg.indices:
-                outputs[category] = 0.0
-                continue
-            selected = scores_np[self._index_arrays[category]]
-            if cfg.reduce_type == "mean":
-                outputs[category] = float(np.mean(selected))
-            else:
-                outputs[category] = float(np.max(selected))
-        return outputs
+        return dict(zip(self._category_names, self._category_vector(yamnet_scores).tolist()))
+
+    def _category_vector(self, yamnet_scores: tf.Tensor) -> np.ndarray:
+        # All categories in one shot: a weighted matvec for "mean" rows and a masked
+        # row-max for "max" rows, instead of a gather + reduce per category.
+        scores_np = np.asarray(yamnet_scores, dtype=np.float32)
+        values = self._mean_weights @ scores_np
+        if self._is_max.any():
+            masked = np.where(self._max_mask, scores_np, -np.inf).max(axis=1)
+            values = np.where(self._is_max, masked, values)
+        return values
 
     def _load_class_map(self, path: Path) -> Dict[str, CategoryConfig]:
         if not path.exists():
             raise FileNotFoundError(f"Class map not found at {path}")
-        with path.open("r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
+        cache_key = str(path.resolve())
+        mtime_ns = path.stat().st_mtime_ns
+        cached = _CLASS_MAP_CACHE.get(cache_key)
+        if cached is not None and cached[0] == mtime_ns:
+            data = cached[1]
+        else:
+            with path.open("r", encoding="utf-8") as f:
+                data = yaml.load(f, Loader=_YAML_LOADER) or {}
+            _CLASS_MAP_CACHE[cache_key] = (mtime_ns, data)
         categories = data.get("categories", {})
         parsed: Dict[str, CategoryConfig] = {}
-        self._index_arrays: Dict[str, np.ndarray] = {}
         for name, cfg in categories.items():
             indices = cfg.get("indices", [])
             if not all(0 <= i <= 520 for i in indices):
@@ -229,7 +405,23 @@ class SemanticDetective:
                 color=cfg.get("color", "#FFFFFF"),
                 reduce_type=cfg.get("reduce_type", "max"),
             )
-            self._index_arrays[name] = np.array(indices, dtype=np.intp)
+
+        # Dense (categories x 521) lookup tables for _map_to_categories. Categories
+        # without indices keep an all-zero mean row so they map to 0.0.
+        self._category_names: List[str] = list(parsed)
+        self._mean_weights = np.zeros((len(parsed), YAMNET_NUM_CLASSES), dtype=np.float32)
+        self._max_mask = np.zeros((len(parsed), YAMNET_NUM_CLASSES), dtype=bool)
+        self._is_max = np.zeros(len(parsed), dtype=bool)
+        for row, cfg in enumerate(parsed.values()):
+            if not cfg.indices:
+                continue
+            indices = np.asarray(cfg.indices, dtype=np.intp)
+            if cfg.reduce_type == "mean":
+                # np.add.at so repeated indices weigh in like they did in np.mean
+                np.add.at(self._mean_weights[row], indices, 1.0 / len(indices))
+            else:
+                self._max_mask[row, indices] = True
+                self._is_max[row] = True
         return parsed
 
 
@@ -240,5 +432,6 @@ __all__ = [
     "MedianSmoother",
     "SchmittTrigger",
     "SemanticDetective",
+    "YAMNET_NUM_CLASSES",
     "YAMNET_SAMPLE_RATE",
 ]
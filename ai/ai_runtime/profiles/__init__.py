@@ -1,5 +1,5 @@
 """Profile management for semantic noise suppression."""
-from .profile_manager import ProfileManager, Profile, AutoTrigger
+from .profile_manager import ProfileManager, Profile, AutoTrigger, TriggerTable
 from .control_engine import ControlEngine, ControlMode
 from .profiler import get_profiler, profile_operation, PerformanceProfiler
 
@@ -7,6 +7,7 @@ __all__ = [
     "ProfileManager",
     "Profile",
     "AutoTrigger",
+    "TriggerTable",
     "ControlEngine",
     "ControlMode",
     "PerformanceProfiler",
@@ -22,6 +22,37 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Profile suppression_params keys forwarded verbatim to SemanticSuppressor.suppress().
+_FORWARDED_SUPPRESSION_PARAMS = frozenset(
+    {
+        "separator_backend",
+        "masking_method",
+        "detection_threshold",
+        "aggressiveness",
+        "audiosep_hive15cat_model_path",
+        "audiosep_hive15cat_device",
+        "audiosep_hive15cat_realtime_hop_seconds",
+        "codecsep_dnrv2_15cat_model_path",
+        "codecsep_dnrv2_15cat_runtime",
+        "codecsep_dnrv2_15cat_device",
+        "codecsep_dnrv2_15cat_realtime_hop_seconds",
+        "codecsep_checkpoint_path",
+        "codecsep_device",
+        "codecsep_prompt_overrides",
+        "codecsep_negative_prompts",
+        "codecsep_preserve_prompts",
+        "codecsep_mode",
+        "codecsep_query_strategy",
+        "codecsep_multistep_steps",
+        "codecsep_stereo_mode",
+        "codecsep_fixed_merge_policy",
+        "codecsep_product_categories",
+        "codecsep_hive_class_ids",
+        "universal_prompts",
+        "suppress_all",
+    }
+)
+
 
 class ControlMode(Enum):
     """Control mode for the noise suppression system."""
@@ -194,20 +225,13 @@ class ControlEngine:
                 # No profile is passthrough
                 return audio
 
-            # Copy suppressions to avoid depending on shared mutable state outside the lock
-            suppressions = dict(profile.suppressions) if profile.suppressions else {}
-
-        # Check if passthrough mode (optimization)
-        if not suppressions or all(not enabled for enabled in suppressions.values()):
-            # No suppressions active, bypass processing
-            return audio
-
-        # Get active suppression categories
-        active_suppressions = [
-            category for category, enabled in suppressions.items()
-            if enabled
-        ]
+            # Snapshot active categories to avoid depending on shared mutable state outside the lock
+            active_suppressions = [
+                category for category, enabled in (profile.suppressions or {}).items()
+                if enabled
+            ]
 
+        # Passthrough bypass: no suppressions active, skip processing
         if not active_suppressions:
             return audio
 
@@ -219,35 +243,8 @@ class ControlEngine:
                 "suppress_categories": active_suppressions,
             }
             if profile.suppression_params:
-                allowed = {
-                    "separator_backend",
-                    "masking_method",
-                    "detection_threshold",
-                    "aggressiveness",
-                    "audiosep_hive15cat_model_path",
-                    "audiosep_hive15cat_device",
-                    "audiosep_hive15cat_realtime_hop_seconds",
-                    "codecsep_dnrv2_15cat_model_path",
-                    "codecsep_dnrv2_15cat_runtime",
-                    "codecsep_dnrv2_15cat_device",
-                    "codecsep_dnrv2_15cat_realtime_hop_seconds",
-                    "codecsep_checkpoint_path",
-                    "codecsep_device",
-                    "codecsep_prompt_overrides",
-                    "codecsep_negative_prompts",
-                    "codecsep_preserve_prompts",
-                    "codecsep_mode",
-                    "codecsep_query_strategy",
-                    "codecsep_multistep_steps",
-                    "codecsep_stereo_mode",
-                    "codecsep_fixed_merge_policy",
-                    "codecsep_product_categories",
-                    "codecsep_hive_class_ids",
-                    "universal_prompts",
-                    "suppress_all",
-                }
                 for k, v in profile.suppression_params.items():
-                    if k in allowed:
+                    if k in _FORWARDED_SUPPRESSION_PARAMS:
                         kwargs[k] = v
             clean_audio = self.suppressor.suppress(**kwargs)
             return clean_audio
@@ -292,27 +289,16 @@ class ControlEngine:
         Returns:
             Best matching Profile or None
         """
-        profiles = self.profile_manager.get_all_profiles()
-
-        # Score each profile based on its triggers
-        best_profile = None
-        best_score = 0.0
-
-        for profile in profiles:
-            if not profile.auto_triggers:
-                continue
-
-            score = 0.0
-            for trigger in profile.auto_triggers:
-                confidence = detections.get(trigger.category, 0.0)
-                if confidence >= trigger.threshold:
-                    score += confidence
-
-            if score > best_score:
-                best_score = score
-                best_profile = profile
-
-        return best_profile
+        table = self.profile_manager.get_trigger_table()
+        if not table.profiles:
+            return None
+
+        # One vectorised pass over every trigger instead of a per-profile Python loop
+        scores = table.score(detections)
+        best = int(np.argmax(scores))  # first maximum, matching the old strict ">" scan
+        if scores[best] <= 0.0:
+            return None
+        return table.profiles[best]
 
     def get_status(self) -> dict:
         """
@@ -9,11 +9,13 @@ from __future__ import annotations
 import json
 import logging
 import uuid
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 from platformdirs import user_data_dir
 
 from ai.ai_runtime.utils.paths import get_config_path
@@ -98,6 +100,32 @@ class Profile:
         return d
 
 
+@dataclass(frozen=True)
+class TriggerTable:
+    """
+    Flattened (structure-of-arrays) view of every profile's auto triggers.
+
+    Row ``i`` describes one trigger: it belongs to ``profiles[profile_index[i]]``,
+    watches ``categories[category_index[i]]`` and fires at ``thresholds[i]``.
+    """
+    profiles: Tuple[Profile, ...]
+    categories: Dict[str, int]
+    profile_index: np.ndarray
+    category_index: np.ndarray
+    thresholds: np.ndarray
+
+    def score(self, detections: Dict[str, float]) -> np.ndarray:
+        """Per-profile sum of detection confidences that meet their trigger threshold."""
+        confidences = np.zeros(len(self.categories), dtype=np.float64)
+        for category, confidence in detections.items():
+            idx = self.categories.get(category)
+            if idx is not None:
+                confidences[idx] = confidence
+        per_trigger = confidences[self.category_index]
+        per_trigger[per_trigger < self.thresholds] = 0.0
+        return np.bincount(self.profile_index, weights=per_trigger, minlength=len(self.profiles))
+
+
 class ProfileManager:
     """
     Manage suppression profiles.
@@ -123,6 +151,13 @@ class ProfileManager:
         self.profiles_dir.mkdir(parents=True, exist_ok=True)
 
         self.profiles: Dict[str, Profile] = {}
+        # Snapshot of profiles.values(); rebuilt lazily after create/delete/load.
+        self._all_profiles: Optional[Tuple[Profile, ...]] = None
+        self._system_profiles: Optional[Tuple[Profile, ...]] = None
+        self._user_profiles: Optional[Tuple[Profile, ...]] = None
+        self._trigger_table: Optional[TriggerTable] = None
+        # Profiles awaiting a disk write while inside batch_updates(); None when writing through.
+        self._pending_saves: Optional[Dict[str, Profile]] = None
         self._load_profiles()
 
     def _load_profiles(self) -> None:
@@ -153,18 +188,60 @@ class ProfileManager:
 
         if user_count > 0:
             logger.info(f"Loaded {user_count} user profiles")
+        self._invalidate_cache()
+
+    def _invalidate_cache(self) -> None:
+        """Drop cached profile snapshots after the profile set changes."""
+        self._all_profiles = None
+        self._system_profiles = None
+        self._user_profiles = None
+        self._trigger_table = None
+
+    def get_all_profiles(self) -> Tuple[Profile, ...]:
+        """Get all available profiles (cached, read-only snapshot)."""
+        if self._all_profiles is None:
+            self._all_profiles = tuple(self.profiles.values())
+        return self._all_profiles
+
+    def get_trigger_table(self) -> TriggerTable:
+        """
+        Get the auto-trigger table for all profiles.
 
-    def get_all_profiles(self) -> List[Profile]:
-        """Get all available profiles."""
-        return list(self.profiles.values())
-
-    def get_system_profiles(self) -> List[Profile]:
-        """Get only system (built-in) profiles."""
-        return [p for p in self.profiles.values() if p.is_system_profile]
-
-    def get_user_profiles(self) -> List[Profile]:
-        """Get only user-created profiles."""
-        return [p for p in self.profiles.values() if not p.is_system_profile]
+        Cached until the next create/update/delete or flush(). Profiles must be changed
+        through those methods, never by mutating the returned profile objects directly,
+        or the table keeps serving stale triggers.
+        """
+        if self._trigger_table is None:
+            profiles = self.get_all_profiles()
+            categories: Dict[str, int] = {}
+            profile_index: List[int] = []
+            category_index: List[int] = []
+            thresholds: List[float] = []
+            for i, profile in enumerate(profiles):
+                for trigger in profile.auto_triggers:
+                    profile_index.append(i)
+                    category_index.append(categories.setdefault(trigger.category, len(categories)))
+                    thresholds.append(trigger.threshold)
+            self._trigger_table = TriggerTable(
+                profiles=profiles,
+                categories=categories,
+                profile_index=np.asarray(profile_index, dtype=np.intp),
+                category_index=np.asarray(category_index, dtype=np.intp),
+                thresholds=np.asarray(thresholds, dtype=np.float64),
+            )
+        return self._trigger_table
+
+    def get_system_profiles(self) -> Tuple[Profile, ...]:
+        """Get only system (built-in) profiles (cached, read-only snapshot)."""
+        if self._system_profiles is None:
+            self._system_profiles = tuple(p for p in self.get_all_profiles() if p.is_system_profile)
+        return self._system_profiles
+
+    def get_user_profiles(self) -> Tuple[Profile, ...]:
+        """Get only user-created profiles (cached, read-only snapshot)."""
+        if self._user_profiles is None:
+            self._user_profiles = tuple(p for p in self.get_all_profiles() if not p.is_system_profile)
+        return self._user_profiles
 
     def apply_profile(self, profile: "Profile") -> Dict[str, float]:
         """
@@ -219,6 +296,7 @@ class ProfileManager:
         )
 
         self.profiles[profile.id] = profile
+        self._invalidate_cache()
         self._save_profile(profile)
 
         logger.info(f"Created profile: {name} ({profile.id})")
@@ -269,6 +347,7 @@ class ProfileManager:
             profile.suppression_params = suppression_params
 
         profile.updated_at = datetime.utcnow().isoformat() + "Z"
+        self._invalidate_cache()
 
         self._save_profile(profile)
         logger.info(f"Updated profile: {profile.name} ({profile_id})")
@@ -297,6 +376,9 @@ class ProfileManager:
 
         # Remove from memory
         del self.profiles[profile_id]
+        self._invalidate_cache()
+        if self._pending_saves is not None:
+            self._pending_saves.pop(profile_id, None)
 
         # Remove from disk
         file_path = self.profiles_dir / f"{profile_id}.json"
@@ -306,14 +388,55 @@ class ProfileManager:
         logger.info(f"Deleted profile: {profile.name} ({profile_id})")
         return True
 
+    @contextmanager
+    def batch_updates(self) -> Iterator["ProfileManager"]:
+        """
+        Defer profile writes until the block exits.
+
+        Each touched profile is written once on exit, however many times it was
+        created/updated inside the block. Nested blocks flush with the outermost.
+
+        Usage:
+            with manager.batch_updates():
+                manager.update_profile(pid, name="Focus")
+                manager.update_profile(pid, gains={"speech": 1.0, "noise": 0.2, "events": 0.5})
+        """
+        if self._pending_saves is not None:
+            yield self
+            return
+        self._pending_saves = {}
+        try:
+            yield self
+        finally:
+            try:
+                self.flush()
+            finally:
+                self._pending_saves = None
+
+    def flush(self) -> None:
+        """Write any profiles deferred by batch_updates()."""
+        self._invalidate_cache()
+        if not self._pending_saves:
+            return
+        pending, self._pending_saves = self._pending_saves, {}
+        for profile in pending.values():
+            self._write_profile(profile)
+
     def _save_profile(self, profile: Profile) -> None:
         """Save profile to disk (user profiles only)."""
         if profile.is_system_profile:
             return  # Don't save system profiles
 
+        if self._pending_saves is not None:
+            self._pending_saves[profile.id] = profile
+            return
+        self._write_profile(profile)
+
+    def _write_profile(self, profile: Profile) -> None:
+        """Serialize one user profile to its JSON file."""
         file_path = self.profiles_dir / f"{profile.id}.json"
         with file_path.open("w", encoding="utf-8") as f:
             json.dump(profile.to_dict(), f, indent=2)
 
 
-__all__ = ["ProfileManager", "Profile", "AutoTrigger"]
+__all__ = ["ProfileManager", "Profile", "AutoTrigger", "TriggerTable"]
@@ -4,8 +4,10 @@ Waveformer inference wrapper for the Semantic Noise Mixer.
 
 from __future__ import annotations
 
+import contextlib
 import logging
 import sys
+import threading
 from pathlib import Path
 from typing import Iterable, Mapping, Optional, Sequence, Union
 
@@ -75,6 +77,26 @@ TARGETS: Sequence[str] = (
 )
 
 
+_AMP_DTYPES = {"fp16": torch.float16, "bf16": torch.bfloat16, "fp32": None}
+# Windows per forward pass in chunked separate(); bounds peak activation memory
+_CHUNK_BATCH = 4
+# ONNX metadata_props key ai.export.export_onnx records: "channel_last" or "channel_first"
+ONNX_OUTPUT_LAYOUT_KEY = "output_layout"
+
+
+def ort_output_is_channel_last(session) -> bool:
+    """Whether an ORT session's output is (B, T, C) rather than the model's native (B, C, T).
+
+    Reads the layout recorded at export time; exports that predate the metadata
+    are told apart by whether the last output axis matches the input channel count.
+    """
+    layout = session.get_modelmeta().custom_metadata_map.get(ONNX_OUTPUT_LAYOUT_KEY)
+    if layout in ("channel_last", "channel_first"):
+        return layout == "channel_last"
+    channels = session.get_inputs()[0].shape[1]
+    return session.get_outputs()[0].shape[-1] == channels
+
+
 class WaveformerSeparator:
     """Simple Waveformer inference wrapper."""
 
@@ -85,12 +107,20 @@ class WaveformerSeparator:
         device: Optional[Union[str, torch.device]] = None,
         use_onnx: bool = False,
         onnx_path: Optional[Path] = None,
+        compile_model: bool = True,
+        precision: str = "fp16",
+        torchscript: bool = False,
     ) -> None:
         self.config_path = config_path or get_waveformer_config_path()
         self.checkpoint_path = checkpoint_path or get_waveformer_checkpoint_path()
         self.device = torch.device(device) if device else self._auto_device()
         self._use_onnx = use_onnx
+        if precision not in _AMP_DTYPES:
+            raise ValueError(f"Unsupported precision: {precision}. Must be one of: {', '.join(_AMP_DTYPES)}")
+        # Autocast only on CUDA; the CPU path stays FP32 (and INT8-quantized Linear layers).
+        self._amp_dtype = _AMP_DTYPES[precision] if self.device.type == "cuda" else None
         self._ort_session = None
+        self._ort_channel_last = False
 
         if use_onnx:
             _onnx_file = onnx_path or (WAVEFORMER_DIR / "waveformer.onnx")
@@ -118,6 +148,8 @@ class WaveformerSeparator:
                 str(_onnx_file), sess_options, providers=providers
             )
             logger.info("ONNX Runtime initialized with providers: %s", self._ort_session.get_providers())
+            # Current exports emit (B, T, C); older ones emit the model's native (B, C, T).
+            self._ort_channel_last = ort_output_is_channel_last(self._ort_session)
 
         self._ensure_assets_exist()
         params = utils.Params(str(self.config_path))
@@ -131,7 +163,19 @@ class WaveformerSeparator:
                 self.model, {torch.nn.Linear}, dtype=torch.qint8
             )
 
-        if self.device.type == "cuda" and not use_onnx:
+        # Opt-in, CPU only: TorchScript trims Python dispatch on CPU but is known to
+        # regress on GPU, where torch.compile below is used instead.
+        self._scripted = False
+        if torchscript and self.device.type == "cpu" and not use_onnx:
+            try:
+                self.model = torch.jit.optimize_for_inference(torch.jit.script(self.model))
+                self._scripted = True
+                logger.info("TorchScript enabled for CPU inference (optimize_for_inference)")
+            except Exception as exc:
+                logger.warning("TorchScript failed, falling back to eager mode: %s", exc)
+
+        # Exporters pass compile_model=False: they need the plain nn.Module, not a Dynamo wrapper.
+        if compile_model and self.device.type == "cuda" and not use_onnx and hasattr(torch, "compile"):
             try:
                 self.model = torch.compile(self.model, mode="reduce-overhead")
                 logger.info("torch.compile enabled for GPU inference (mode=reduce-overhead)")
@@ -140,17 +184,32 @@ class WaveformerSeparator:
 
         self._resample_in = {}
         self._resample_out = {}
+        # Canonical query tensors are shared across calls; neither the model nor the
+        # ONNX path writes to its query, so callers must not mutate what _build_query returns.
+        self._ones_query = torch.ones(1, len(TARGETS), dtype=torch.float32, device=self.device)
         self._query_cache = {}
+        # CUDA only: pinned host staging buffer + device input, reused while the shape holds.
+        # Shared by every caller, so _stage_lock spans the copy and the forward that reads it.
+        self._pinned_in: Optional[torch.Tensor] = None
+        self._device_in: Optional[torch.Tensor] = None
+        self._stage_lock = threading.Lock()
         self._warm_up()
 
     def _warm_up(self) -> None:
         try:
             dummy_audio = np.zeros(TARGET_SAMPLE_RATE, dtype=np.float32)
-            self.separate(dummy_audio, TARGET_SAMPLE_RATE, targets=TARGETS[:1])
+            # The TorchScript profiling executor specializes on the second run
+            for _ in range(2 if self._scripted else 1):
+                self.separate(dummy_audio, TARGET_SAMPLE_RATE, targets=TARGETS[:1])
             logger.info("Model warm-up complete")
         except Exception as exc:
             logger.warning("Warm-up inference failed (non-critical): %s", exc)
 
+    def _autocast(self) -> contextlib.AbstractContextManager:
+        if self._amp_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type="cuda", dtype=self._amp_dtype)
+
     def _auto_device(self) -> torch.device:
         if torch.cuda.is_available():
             return torch.device("cuda")
@@ -173,33 +232,58 @@ class WaveformerSeparator:
         audio: Union[np.ndarray, torch.Tensor],
         input_format: Optional[str] = None,
     ) -> torch.Tensor:
+        if isinstance(audio, np.ndarray):
+            return self._numpy_to_channel_first(audio, input_format)
+
         tensor = torch.as_tensor(audio, dtype=torch.float32)
         if tensor.ndim == 1:
             tensor = tensor.unsqueeze(0)
         elif tensor.ndim == 2:
-            if input_format == "channel_last":
-                tensor = tensor.transpose(0, 1)
-            elif input_format == "channel_first":
-                pass
-            elif input_format is not None:
-                raise ValueError(
-                    f"Unsupported input_format '{input_format}'. Expected channel_first/channel_last/None."
-                )
-            elif tensor.shape[0] > tensor.shape[1]:
+            if self._is_channel_last(tensor.shape, input_format):
                 tensor = tensor.transpose(0, 1)
         else:
             raise ValueError(f"Expected 1D or 2D audio, got {tensor.ndim}D")
 
         if tensor.shape[0] > 1:
             tensor = tensor.mean(dim=0, keepdim=True)
-        return tensor
+        return tensor.contiguous()
+
+    def _numpy_to_channel_first(self, audio: np.ndarray, input_format: Optional[str]) -> torch.Tensor:
+        # Downmix/convert in one NumPy pass and hand torch the result zero-copy,
+        # instead of a dtype copy, a strided transpose and a later re-materialisation.
+        if audio.ndim == 1:
+            mono = audio
+        elif audio.ndim == 2:
+            channel_axis = 1 if self._is_channel_last(audio.shape, input_format) else 0
+            if audio.shape[channel_axis] > 1:
+                mono = audio.mean(axis=channel_axis, dtype=np.float32)
+            else:
+                mono = audio[:, 0] if channel_axis == 1 else audio[0]
+        else:
+            raise ValueError(f"Expected 1D or 2D audio, got {audio.ndim}D")
+        if not mono.flags.writeable:
+            # e.g. np.frombuffer over bytes/shared memory: torch can't safely wrap it
+            return torch.from_numpy(np.array(mono, dtype=np.float32, copy=True)).unsqueeze(0)
+        return torch.from_numpy(np.ascontiguousarray(mono, dtype=np.float32)).unsqueeze(0)
+
+    @staticmethod
+    def _is_channel_last(shape: Sequence[int], input_format: Optional[str]) -> bool:
+        if input_format == "channel_last":
+            return True
+        if input_format == "channel_first":
+            return False
+        if input_format is not None:
+            raise ValueError(
+                f"Unsupported input_format '{input_format}'. Expected channel_first/channel_last/None."
+            )
+        return shape[0] > shape[1]
 
     def _build_query(
         self,
         targets: Optional[Union[Sequence[str], torch.Tensor, np.ndarray]],
     ) -> torch.Tensor:
         if targets is None:
-            return torch.ones(1, len(TARGETS), dtype=torch.float32, device=self.device)
+            return self._ones_query
 
         if isinstance(targets, (torch.Tensor, np.ndarray)):
             query = torch.as_tensor(targets, dtype=torch.float32, device=self.device)
@@ -213,9 +297,10 @@ class WaveformerSeparator:
 
         cache_key = None
         if isinstance(targets, (list, tuple)) and all(isinstance(t, str) for t in targets):
-            cache_key = tuple(sorted(targets))
-            if cache_key in self._query_cache:
-                return self._query_cache[cache_key].clone()
+            cache_key = frozenset(targets)
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                return cached
 
         query = torch.zeros(1, len(TARGETS), dtype=torch.float32, device=self.device)
         for target in targets:
@@ -224,7 +309,7 @@ class WaveformerSeparator:
             query[0, TARGETS.index(target)] = 1.0
 
         if cache_key is not None:
-            self._query_cache[cache_key] = query.clone()
+            self._query_cache[cache_key] = query
         return query
 
     def separate(
@@ -232,7 +317,13 @@ class WaveformerSeparator:
         audio: Union[np.ndarray, torch.Tensor],
         sample_rate: int,
         targets: Optional[Union[Sequence[str], torch.Tensor, np.ndarray]] = None,
+        chunk_seconds: Optional[float] = None,
+        overlap: float = 0.25,
     ) -> np.ndarray:
+        if chunk_seconds is not None and chunk_seconds <= 0:
+            raise ValueError(f"chunk_seconds must be positive, got {chunk_seconds}")
+        if not 0.0 <= overlap < 1.0:
+            raise ValueError(f"overlap must be in [0, 1), got {overlap}")
         mixture = self._to_channel_first(audio)
         needs_resample = sample_rate != TARGET_SAMPLE_RATE
         if needs_resample:
@@ -252,10 +343,19 @@ class WaveformerSeparator:
             }
             ort_output = self._ort_session.run(None, ort_inputs)[0]
             output = torch.from_numpy(ort_output).squeeze(0)
+            if self._ort_channel_last:
+                output = output.transpose(0, 1)  # view; the final transpose undoes it for free
+        elif (
+            chunk_seconds is not None
+            and query.shape[0] == 1
+            and mixture.shape[-1] > int(chunk_seconds * TARGET_SAMPLE_RATE)
+        ):
+            output = self._forward_chunked(mixture, query, chunk_seconds, overlap)
         else:
-            mixture_gpu = mixture.to(self.device)
-            with torch.inference_mode():
-                output = self.model(mixture_gpu, query).squeeze(0).cpu()
+            with self._stage_lock:
+                mixture_gpu = self._stage_input(mixture)
+                with torch.inference_mode(), self._autocast():
+                    output = self.model(mixture_gpu, query).squeeze(0).float().cpu()
 
         if needs_resample:
             if sample_rate not in self._resample_out:
@@ -266,6 +366,66 @@ class WaveformerSeparator:
 
         return output.transpose(0, 1).numpy()
 
+    def _stage_input(self, mixture: torch.Tensor) -> torch.Tensor:
+        """Move a (1, C, T) mixture to the device, reusing staging buffers on CUDA.
+
+        Callers must hold ``_stage_lock`` until they are done with the returned tensor.
+        """
+        if self.device.type != "cuda":
+            return mixture.to(self.device)
+        if self._pinned_in is None or self._pinned_in.shape != mixture.shape:
+            self._pinned_in = torch.empty(mixture.shape, dtype=torch.float32, pin_memory=True)
+            self._device_in = torch.empty(mixture.shape, dtype=torch.float32, device=self.device)
+        self._pinned_in.copy_(mixture)
+        # Stream-ordered, so the forward that follows sees the finished copy
+        self._device_in.copy_(self._pinned_in, non_blocking=True)
+        return self._device_in
+
+    def _forward_chunked(
+        self,
+        mixture: torch.Tensor,
+        query: torch.Tensor,
+        chunk_seconds: float,
+        overlap: float,
+    ) -> torch.Tensor:
+        """Run the model over fixed-size windows of a (1, C, T) mixture and overlap-add."""
+        total = mixture.shape[-1]
+        chunk = int(chunk_seconds * TARGET_SAMPLE_RATE)
+        hop = max(1, int(chunk * (1.0 - overlap)))
+        n_chunks = -(-max(total - chunk, 0) // hop) + 1
+        padded = torch.nn.functional.pad(mixture, (0, (n_chunks - 1) * hop + chunk - total))
+        # (1, C, T) -> (K, C, chunk) view, no copy until the device transfer
+        frames = padded[0].unfold(-1, chunk, hop).permute(1, 0, 2)
+
+        # Hann fade over the overlap region; the edges of the clip are not faded
+        fade = chunk - hop
+        window = torch.ones(chunk)
+        if fade > 0:
+            ramp = torch.hann_window(2 * fade, periodic=False)
+            window[:fade] = ramp[:fade]
+            window[-fade:] = ramp[fade:]
+
+        output = torch.zeros(mixture.shape[1], padded.shape[-1])
+        weight = torch.zeros(padded.shape[-1])
+        pin = self.device.type == "cuda"
+        for start in range(0, n_chunks, _CHUNK_BATCH):
+            block = frames[start:start + _CHUNK_BATCH].contiguous()
+            if pin:
+                block = block.pin_memory()
+            block = block.to(self.device, non_blocking=pin)
+            with torch.inference_mode(), self._autocast():
+                block_out = self.model(block, query.expand(block.shape[0], -1)).float().cpu()
+            for i, chunk_out in enumerate(block_out, start=start):
+                w = window.clone()
+                if i == 0:
+                    w[:fade] = 1.0
+                if i == n_chunks - 1:
+                    w[chunk - fade:] = 1.0
+                offset = i * hop
+                output[:, offset:offset + chunk] += chunk_out * w
+                weight[offset:offset + chunk] += w
+        return (output / weight.clamp_min(1e-8))[:, :total]
+
     def separate_multi_query(
         self,
         audio: Union[np.ndarray, torch.Tensor],
@@ -295,14 +455,14 @@ class WaveformerSeparator:
             outputs_ct = []
             for q in queries:
                 ort_inputs = {"audio_input": mixture_np, "query_vector": q.cpu().numpy()}
-                ort_out = self._ort_session.run(None, ort_inputs)[0]
-                outputs_ct.append(torch.from_numpy(ort_out).squeeze(0))
+                ort_out = torch.from_numpy(self._ort_session.run(None, ort_inputs)[0]).squeeze(0)
+                outputs_ct.append(ort_out.transpose(0, 1) if self._ort_channel_last else ort_out)
         else:
             mixture_gpu = mixture_unsqueeze.to(self.device)
             mixture_batch = mixture_gpu.expand(n_groups, -1, -1).contiguous()
             queries_batch = torch.cat(queries, dim=0)
-            with torch.inference_mode():
-                batch_output = self.model(mixture_batch, queries_batch)
+            with torch.inference_mode(), self._autocast():
+                batch_output = self.model(mixture_batch, queries_batch).float()
             outputs_ct = [batch_output[i].cpu() for i in range(n_groups)]
 
         if needs_resample:
@@ -310,8 +470,8 @@ class WaveformerSeparator:
                 self._resample_out[sample_rate] = torchaudio.transforms.Resample(
                     orig_freq=TARGET_SAMPLE_RATE, new_freq=sample_rate
                 ).to(outputs_ct[0].device)
-            resampler = self._resample_out[sample_rate]
-            outputs_ct = [resampler(o) for o in outputs_ct]
+            # One resample over the stacked (K, C, T) outputs instead of K calls
+            outputs_ct = list(self._resample_out[sample_rate](torch.stack(outputs_ct)).unbind(0))
 
         return [o.transpose(0, 1).numpy() for o in outputs_ct]
 
@@ -321,10 +481,18 @@ class WaveformerSeparator:
         sample_rate: int,
         stem_queries: Mapping[str, Iterable[str]],
     ) -> Mapping[str, np.ndarray]:
-        results = {}
-        for stem, targets in stem_queries.items():
-            results[stem] = self.separate(audio, sample_rate, targets=targets)
-        return results
-
-
-__all__ = ["TARGET_SAMPLE_RATE", "TARGETS", "WaveformerSeparator"]
+        # All stems share one resample and one batched forward pass
+        stems = list(stem_queries)
+        outputs = self.separate_multi_query(
+            audio, sample_rate, [list(stem_queries[stem]) for stem in stems]
+        )
+        return dict(zip(stems, outputs))
+
+
+__all__ = [
+    "ONNX_OUTPUT_LAYOUT_KEY",
+    "TARGET_SAMPLE_RATE",
+    "TARGETS",
+    "WaveformerSeparator",
+    "ort_output_is_channel_last",
+]
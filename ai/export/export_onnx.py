@@ -9,19 +9,50 @@ experiments only.
 from __future__ import annotations
 
 import argparse
+import inspect
 import logging
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import numpy as np
-import onnx
-import onnxruntime as ort
 import torch
 
 from ai.ai_runtime.separation import WaveformerSeparator
+from ai.ai_runtime.separation.waveformer_separator import (
+    ONNX_OUTPUT_LAYOUT_KEY,
+    ort_output_is_channel_last,
+)
+
+if TYPE_CHECKING:
+    import onnxruntime as ort
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_PROTOBUF_LIMIT_BYTES = 2 * 1024**3
+
+
+class _ChannelLastOutput(torch.nn.Module):
+    """Export-time shim that emits (B, T, C) so ONNX callers get PyTorch ``separate()`` layout."""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, audio: torch.Tensor, query: torch.Tensor) -> torch.Tensor:
+        return self.model(audio, query).transpose(1, 2)
+
+
+def _record_output_layout(model_path: Path, channel_last: bool) -> None:
+    """Stamp the output layout into ``metadata_props`` so runtimes needn't infer it from shapes."""
+    import onnx
+
+    model = onnx.load(str(model_path))
+    props = {prop.key: prop.value for prop in model.metadata_props}
+    props[ONNX_OUTPUT_LAYOUT_KEY] = "channel_last" if channel_last else "channel_first"
+    onnx.helper.set_model_props(model, props)
+    onnx.save(model, str(model_path))
+
 
 class ONNXExporter:
     """Export the legacy full-window Waveformer graph to ONNX format."""
@@ -35,6 +66,9 @@ class ONNXExporter:
         opset_version: int = 17, # Historical full-window export compatibility value
         use_fp16: bool = True,
         use_int8: bool = False,
+        use_dynamo: bool = True,
+        target: str = "cuda",
+        channel_last_output: bool = True,
     ) -> Path:
         """
         Export model to ONNX.
@@ -42,11 +76,29 @@ class ONNXExporter:
         Args:
             output_path: Path to save .onnx file
             opset_version: ONNX opset version
-            use_fp16: Apply FP16 quantization
+            use_fp16: Convert the graph to FP16 (requires onnxconverter-common)
+            use_int8: Also write an INT8 dynamically quantized copy next to the output
+            use_dynamo: Lower through TorchDynamo/FX (falls back to the TorchScript
+                tracer if the dynamo exporter is unavailable or fails)
+            target: Deployment EP, "cuda" or "cpu". CPU targets skip FP16 (x86 ORT
+                kernels upcast it) and always get the INT8 copy instead.
+            channel_last_output: Emit ``separated_audio`` as (B, T, C) instead of the
+                model's native (B, C, T), so consumers don't transpose every output
         
         Returns:
             Path to exported ONNX file
         """
+        if target not in {"cuda", "cpu"}:
+            raise ValueError(f"Unsupported target: {target}. Must be one of: 'cuda', 'cpu'")
+        if target == "cpu":
+            if use_fp16:
+                logger.info("CPU target: skipping FP16 conversion in favour of INT8 weights")
+            use_fp16 = False
+            use_int8 = True
+
+        # Deferred so importing this module (or running --help) doesn't pay for onnx.
+        import onnx
+
         logger.info(f"Exporting Waveformer to ONNX: {output_path}")
 
         # Create dummy inputs (batch=1, channels=1, samples=44100*3 = 132300)
@@ -57,59 +109,103 @@ class ONNXExporter:
         # Export
         model = self.separator.model
         model.eval()
+        if channel_last_output:
+            model = _ChannelLastOutput(model).eval()
+            output_axes = {0: "batch_size", 1: "audio_length"}
+        else:
+            output_axes = {0: "batch_size", 2: "audio_length"}
 
-        torch.onnx.export(
-            model,
-            (dummy_audio.to(self.separator.device), dummy_query.to(self.separator.device)),
-            output_path,
+        device = self.separator.device
+        example_inputs = (dummy_audio.to(device), dummy_query.to(device))
+        export_kwargs = dict(
             opset_version=opset_version,
             input_names=["audio_input", "query_vector"],
             output_names=["separated_audio"],
             dynamic_axes={
                 "audio_input": {0: "batch_size", 2: "audio_length"},
                 "query_vector": {0: "batch_size"},
-                "separated_audio": {0: "batch_size", 2: "audio_length"},
+                "separated_audio": output_axes,
             },
-            do_constant_folding=True,
         )
 
-        logger.info("ONNX export complete")
+        if use_dynamo:
+            # The FX-based exporter emits fewer Cast/Reshape nodes than the tracer,
+            # which leaves ORT/TensorRT more room to fuse.
+            try:
+                torch.onnx.export(
+                    model,
+                    example_inputs,
+                    str(output_path),
+                    dynamo=True,
+                    external_data=False,
+                    **export_kwargs,
+                )
+            except Exception as exc:
+                logger.warning(
+                    f"Dynamo ONNX export failed, falling back to TorchScript tracer: {exc}"
+                )
+                use_dynamo = False
+
+        if not use_dynamo:
+            # torch>=2.9 defaults to dynamo=True; older releases don't know the keyword.
+            accepts_dynamo = "dynamo" in inspect.signature(torch.onnx.export).parameters
+            legacy_kwargs = {"dynamo": False} if accepts_dynamo else {}
+            torch.onnx.export(
+                model,
+                example_inputs,
+                output_path,
+                do_constant_folding=True,
+                **export_kwargs,
+                **legacy_kwargs,
+            )
 
-        # Validate
-        onnx_model = onnx.load(output_path)
-        onnx.checker.check_model(onnx_model)
-        logger.info("ONNX model validated")
+        logger.info("ONNX export complete")
+        _record_output_layout(output_path, channel_last_output)
 
-        # FP16 quantization
-        if use_fp16:
-            logger.info("Applying FP16 quantization...")
-            from onnxruntime.quantization import quantize_dynamic, QuantType
-            
-            fp16_path = output_path.with_stem(output_path.stem + "_fp16")
-            quantize_dynamic(
-                str(output_path),
-                str(fp16_path),
-                weight_type=QuantType.QFloat16,
-            )
-            
-            # Use FP16 version
-            output_path.unlink()
-            fp16_path.rename(output_path)
-            logger.info(f"FP16 quantized model saved: {output_path}")
+        # Validate from the file path so the checker streams the model instead of us
+        # holding a parsed copy; protobuf can't check single files past 2 GB.
+        if output_path.stat().st_size < _PROTOBUF_LIMIT_BYTES:
+            onnx.checker.check_model(str(output_path), full_check=False)
+            logger.info("ONNX model validated")
+        else:
+            logger.warning("Skipping onnx.checker: model exceeds the 2 GB protobuf limit")
 
-        # INT8 quantization (for mobile CPU inference — ~4x smaller, ~2-3x faster)
+        # INT8 quantization (for mobile CPU inference — ~4x smaller, ~2-3x faster).
+        # Runs on the FP32 graph, before any FP16 conversion.
         if use_int8:
             logger.info("Applying INT8 dynamic quantization...")
             from onnxruntime.quantization import quantize_dynamic, QuantType
             
             int8_path = output_path.with_stem(output_path.stem + "_int8")
+            # INT8 weights for the compute-heavy ops only; activations stay FP32
             quantize_dynamic(
                 str(output_path),
                 str(int8_path),
                 weight_type=QuantType.QInt8,
+                op_types_to_quantize=["MatMul", "Gemm", "Conv"],
+                extra_options={"EnableSubgraph": True},
             )
+            _record_output_layout(int8_path, channel_last_output)
             logger.info(f"INT8 quantized model saved: {int8_path}")
 
+        # FP16 conversion: weights and activations stay FP16 end-to-end so CUDA/TensorRT
+        # can use tensor-core kernels; graph inputs/outputs remain FP32 for callers.
+        if use_fp16:
+            logger.info("Converting graph to FP16...")
+            try:
+                from onnxconverter_common import float16
+            except ImportError as exc:
+                raise ImportError(
+                    "onnxconverter-common is required for FP16 export. "
+                    "Install with: pip install onnxconverter-common"
+                ) from exc
+
+            fp16_model = float16.convert_float_to_fp16(
+                onnx.load(str(output_path)), keep_io_types=True
+            )
+            onnx.save(fp16_model, str(output_path))
+            logger.info(f"FP16 model saved: {output_path}")
+
         return output_path
 
     def validate(
@@ -124,17 +220,32 @@ class ONNXExporter:
         Returns:
             Validation metrics (MSE, correlation)
         """
+        import onnxruntime as ort
+
         logger.info("Validating ONNX export...")
 
         # PyTorch inference
         with torch.inference_mode():
             pt_output = self.separator.separate(test_audio, sample_rate)
 
-        # ONNX inference
-        session = ort.InferenceSession(
-            str(onnx_path),
-            providers=["CUDAExecutionProvider", "CPUExecutionProvider"]
-        )
+        # ONNX inference: prefer TensorRT (FP16 kernels, cached engines), then CUDA, then CPU
+        available = ort.get_available_providers()
+        providers = []
+        if "TensorrtExecutionProvider" in available:
+            providers.append(
+                (
+                    "TensorrtExecutionProvider",
+                    {
+                        "trt_fp16_enable": True,
+                        "trt_engine_cache_enable": True,
+                        "trt_engine_cache_path": str(onnx_path.parent / ".trt_cache"),
+                    },
+                )
+            )
+        if "CUDAExecutionProvider" in available:
+            providers.append("CUDAExecutionProvider")
+        providers.append("CPUExecutionProvider")
+        session = ort.InferenceSession(str(onnx_path), providers=providers)
 
         # Prepare inputs
         audio_tensor = torch.from_numpy(test_audio).float()
@@ -145,23 +256,20 @@ class ONNXExporter:
 
         query_tensor = torch.ones(1, 41)
 
-        onnx_output = session.run(
-            None,
+        onnx_output = self._run_with_io_binding(
+            session,
             {
                 "audio_input": audio_tensor.numpy(),
                 "query_vector": query_tensor.numpy(),
-            }
-        )[0]
-
-        # Compare outputs
-        onnx_output_2d = onnx_output[0].transpose(1, 0)  # (C, T) -> (T, C)
-        min_len = min(pt_output.shape[0], onnx_output_2d.shape[0])
-
-        pt_trimmed = pt_output[:min_len]
-        onnx_trimmed = onnx_output_2d[:min_len]
+            },
+        )
 
-        mse = np.mean((pt_trimmed - onnx_trimmed) ** 2)
-        correlation = np.corrcoef(pt_trimmed.flatten(), onnx_trimmed.flatten())[0, 1]
+        # Compare outputs: PyTorch returns (T, C); channel-last exports match it and
+        # legacy exports return (C, T). Either way compare through views and running
+        # sums instead of materialising a transposed copy.
+        onnx_ct = onnx_output[0].T if ort_output_is_channel_last(session) else onnx_output[0]
+        min_len = min(pt_output.shape[0], onnx_ct.shape[1])
+        mse, correlation = self._compare_outputs(pt_output[:min_len], onnx_ct[:, :min_len])
 
         metrics = {
             "mse": float(mse),
@@ -177,6 +285,51 @@ class ONNXExporter:
 
         return metrics
 
+    @staticmethod
+    def _compare_outputs(pt_tc: np.ndarray, onnx_ct: np.ndarray) -> tuple:
+        """
+        MSE and Pearson correlation between a (T, C) and a (C, T) array.
+
+        Uses five float64-accumulated reductions (sx, sy, sxx, syy, sxy) so no
+        difference, transposed or flattened temporaries are allocated.
+        """
+        n = pt_tc.size
+        sx = float(pt_tc.sum(dtype=np.float64))
+        sy = float(onnx_ct.sum(dtype=np.float64))
+        sxx = float(np.einsum("tc,tc->", pt_tc, pt_tc, dtype=np.float64))
+        syy = float(np.einsum("ct,ct->", onnx_ct, onnx_ct, dtype=np.float64))
+        sxy = float(np.einsum("tc,ct->", pt_tc, onnx_ct, dtype=np.float64))
+
+        mse = max(sxx - 2.0 * sxy + syy, 0.0) / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        if var_x <= 0 or var_y <= 0:
+            return mse, float("nan")
+        return mse, float((sxy - sx * sy / n) / np.sqrt(var_x * var_y))
+
+    @staticmethod
+    def _run_with_io_binding(session: ort.InferenceSession, inputs: dict) -> np.ndarray:
+        """
+        Run one inference through ``io_binding`` so inputs/outputs live on the EP device.
+
+        Inputs are copied to the device once as ``OrtValue``s and the output is
+        allocated by ORT on that device, avoiding the implicit per-run host<->device
+        staging done by ``session.run``.
+        """
+        import onnxruntime as ort
+
+        device = "cuda" if "CUDAExecutionProvider" in session.get_providers() else "cpu"
+        binding = session.io_binding()
+        for name, array in inputs.items():
+            value = ort.OrtValue.ortvalue_from_numpy(
+                np.ascontiguousarray(array, dtype=np.float32), device, 0
+            )
+            binding.bind_ortvalue_input(name, value)
+        for output in session.get_outputs():
+            binding.bind_output(output.name, device)
+        session.run_with_iobinding(binding)
+        return binding.copy_outputs_to_cpu()[0]
+
 
 def main():
     from ai.ai_runtime.utils.paths import get_exports_onnx_path
@@ -198,11 +351,22 @@ def main():
         action="store_true",
         help="Also generate INT8 quantized model (for mobile CPU deployment)"
     )
+    parser.add_argument(
+        "--legacy-tracer",
+        action="store_true",
+        help="Export with the TorchScript tracer instead of torch.export/dynamo"
+    )
+    parser.add_argument(
+        "--target",
+        choices=["cuda", "cpu"],
+        default="cuda",
+        help="Deployment target: cuda keeps FP16, cpu writes an INT8 copy instead"
+    )
 
     args = parser.parse_args()
 
     # Initialize separator
-    separator = WaveformerSeparator()
+    separator = WaveformerSeparator(compile_model=False, precision="fp32")
 
     # Export
     exporter = ONNXExporter(separator)
@@ -212,10 +376,12 @@ def main():
         output_path=args.output,
         use_fp16=not args.no_fp16,
         use_int8=args.int8,
+        use_dynamo=not args.legacy_tracer,
+        target=args.target,
     )
 
-    # Validate with dummy audio
-    test_audio = np.random.randn(44100 * 3).astype(np.float32)
+    # Validate with seeded dummy audio so MSE/correlation are reproducible run to run
+    test_audio = np.random.default_rng(0).standard_normal(44100 * 3, dtype=np.float32)
     metrics = exporter.validate(onnx_path, test_audio, 44100)
 
     print(f"\n✅ Export complete: {onnx_path}")
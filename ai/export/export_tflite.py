@@ -3,15 +3,18 @@
 The active mobile deployment path uses the shared package manifest plus
 ONNX Runtime/ORT artifacts from ``export_waveformer_edge.py``. This script is
 kept only to explain and reproduce the older TFLite-era experiment.
+
+By default the PyTorch module is converted directly with ``ai_edge_torch``;
+``--converter onnx2tf`` reproduces the original ONNX -> onnx2tf route.
 """
 
 from __future__ import annotations
 
 import argparse
 import logging
-import subprocess
 from pathlib import Path
-# from onnx_tf.backend import prepare  <-- Removed
+
+import torch
 
 from ai.ai_runtime.separation import WaveformerSeparator
 from ai.ai_runtime.utils.paths import get_temp_export_path
@@ -33,22 +36,82 @@ class TFLiteExporter:
         output_path: Path,
         temp_dir: Path = None,
         quantization: str = "fp16",
+        converter: str = "ai_edge_torch",
     ) -> Path:
         """
         Export model to TFLite.
         
         Args:
             output_path: Path to save .tflite file
-            temp_dir: Temporary directory for intermediate files
+            temp_dir: Temporary directory for intermediate files (onnx2tf only)
             quantization: Quantization mode: "fp32", "fp16", or "int8"
+            converter: "ai_edge_torch" (direct PyTorch -> TFLite) or "onnx2tf"
         
         Returns:
             Path to exported TFLite file
         """
+        if quantization not in {"fp32", "fp16", "int8"}:
+            raise ValueError(
+                f"Unsupported quantization: {quantization}. "
+                "Must be one of: 'fp32', 'fp16', 'int8'"
+            )
+        if converter not in {"ai_edge_torch", "onnx2tf"}:
+            raise ValueError(
+                f"Unsupported converter: {converter}. "
+                "Must be one of: 'ai_edge_torch', 'onnx2tf'"
+            )
+
+        logger.info(
+            f"Exporting Waveformer to TFLite: {output_path} "
+            f"(quantization={quantization}, converter={converter})"
+        )
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if converter == "ai_edge_torch":
+            self._export_ai_edge_torch(output_path, quantization)
+        else:
+            self._export_onnx2tf(output_path, temp_dir, quantization)
+
+        logger.info(f"TFLite model saved: {output_path}")
+        
+        return output_path
+
+    def _export_ai_edge_torch(self, output_path: Path, quantization: str) -> None:
+        """Trace the PyTorch module straight to a TFLite flatbuffer (no ONNX round-trip)."""
+        try:
+            import ai_edge_torch
+            from ai_edge_torch.generative.quantize import quant_recipes
+        except ImportError as exc:
+            raise ImportError(
+                "ai-edge-torch is required for direct TFLite export. "
+                "Install with: pip install ai-edge-torch (or use --converter onnx2tf)."
+            ) from exc
+
+        # Same static ~3 s @ 44.1 kHz window as the historical ONNX export
+        sample_inputs = (torch.randn(1, 1, 132300), torch.ones(1, 41))
+
+        quant_config = None
+        if quantization == "fp16":
+            logger.info("Applying FP16 quantization...")
+            quant_config = quant_recipes.full_fp16_recipe()
+        elif quantization == "int8":
+            logger.info("Applying INT8 dynamic quantization (for mobile CPU deployment)...")
+            quant_config = quant_recipes.full_int8_dynamic_recipe()
+
+        # The converter needs the module on CPU; move the shared separator's model
+        # back afterwards so the caller can keep using it on its own device.
+        model = self.separator.model.cpu().eval()
+        try:
+            edge_model = ai_edge_torch.convert(model, sample_inputs, quant_config=quant_config)
+        finally:
+            self.separator.model.to(self.separator.device)
+        edge_model.export(str(output_path))
+        logger.info("ai_edge_torch conversion complete")
+
+    def _export_onnx2tf(self, output_path: Path, temp_dir: Path, quantization: str) -> None:
+        """Historical route: export ONNX, then convert it with onnx2tf."""
         if temp_dir is None:
             temp_dir = get_temp_export_path()
-        logger.info(f"Exporting Waveformer to TFLite: {output_path} (quantization={quantization})")
-        output_path.parent.mkdir(parents=True, exist_ok=True)
         temp_dir.mkdir(parents=True, exist_ok=True)
 
         # Step 1: Export to ONNX
@@ -57,61 +120,55 @@ class TFLiteExporter:
             output_path=onnx_path,
             opset_version=17,
             use_fp16=False,  # Don't quantize ONNX, we'll quantize TFLite
+            # Reproduce the historical graph: TorchScript tracer, native (B, C, T) output
+            use_dynamo=False,
+            channel_last_output=False,
         )
 
-        # Step 2: Convert ONNX to TFLite using onnx2tf
-        logger.info("Converting ONNX to TFLite using onnx2tf...")
-        
-        # Construct onnx2tf command
-        cmd = [
-            "onnx2tf",
-            "-i", str(onnx_path),
-            "-o", str(output_path.parent),
-            "-osd" # Output standard TFLite
-        ]
-        
-        if quantization not in {"fp32", "fp16", "int8"}:
-            raise ValueError(f"Unsupported quantization: {quantization}. Must be one of: 'fp32', 'fp16', 'int8'")
+        # Step 2: Convert ONNX to TFLite in-process (no fork/exec or TF re-import per export)
+        try:
+            import onnx2tf
+        except ImportError as exc:
+            raise ImportError(
+                "onnx2tf is required for --converter onnx2tf. "
+                "Install with: pip install onnx2tf tensorflow"
+            ) from exc
 
+        logger.info("Converting ONNX to TFLite using onnx2tf...")
         if quantization == "fp16":
             logger.info("Applying FP16 quantization...")
-            cmd.append("-opt")
-            cmd.append("--float16_quantization")
         elif quantization == "int8":
             logger.info("Applying INT8 quantization (for mobile CPU deployment)...")
-            cmd.append("-oiqt")  # onnx2tf flag for INT8 quantization
 
-        try:
-            subprocess.run(cmd, check=True)
-            
-            # Determine expected generated file based on quantization
-            name_map = {
-                "fp32": "model_float32.tflite",
-                "fp16": "model_float16.tflite",
-                "int8": "model_integer_quant.tflite",
-            }
-            expected_name = name_map.get(quantization, "model_float32.tflite")
-            generated_file = output_path.parent / expected_name
-
-            # Move the generated file to expected output path
-            if generated_file.exists():
-                generated_file.rename(output_path)
-            else:
-                raise FileNotFoundError(
-                    f"Expected TFLite file '{expected_name}' not found in "
-                    f"'{output_path.parent}'. onnx2tf may have failed or produced "
-                    f"a differently named file (quantization={quantization})."
-                )
-
-            logger.info("onnx2tf conversion complete")
-            
-        except subprocess.CalledProcessError as e:
-            logger.error(f"onnx2tf failed: {e}")
-            raise
+        # onnx2tf always writes float32 and float16 flatbuffers; INT8 is opt-in.
+        onnx2tf.convert(
+            input_onnx_file_path=str(onnx_path),
+            output_folder_path=str(output_path.parent),
+            output_signaturedefs=True,
+            output_integer_quantized_tflite=quantization == "int8",
+            non_verbose=True,
+        )
 
-        logger.info(f"TFLite model saved: {output_path}")
-        
-        return output_path
+        # Determine expected generated file based on quantization
+        name_map = {
+            "fp32": "model_float32.tflite",
+            "fp16": "model_float16.tflite",
+            "int8": "model_integer_quant.tflite",
+        }
+        expected_name = name_map.get(quantization, "model_float32.tflite")
+        generated_file = output_path.parent / expected_name
+
+        # Move the generated file to expected output path
+        if generated_file.exists():
+            generated_file.rename(output_path)
+        else:
+            raise FileNotFoundError(
+                f"Expected TFLite file '{expected_name}' not found in "
+                f"'{output_path.parent}'. onnx2tf may have failed or produced "
+                f"a differently named file (quantization={quantization})."
+            )
+
+        logger.info("onnx2tf conversion complete")
 
 
 def main():
@@ -132,6 +189,12 @@ def main():
         action="store_true",
         help="Use INT8 quantization for mobile CPU (4x smaller, 2-3x faster)"
     )
+    parser.add_argument(
+        "--converter",
+        choices=["ai_edge_torch", "onnx2tf"],
+        default="ai_edge_torch",
+        help="Direct PyTorch conversion (default) or the historical ONNX -> onnx2tf route"
+    )
 
     args = parser.parse_args()
 
@@ -144,7 +207,7 @@ def main():
         quant_mode = "fp16"
 
     # Initialize separator
-    separator = WaveformerSeparator()
+    separator = WaveformerSeparator(compile_model=False, precision="fp32")
 
     # Export
     exporter = TFLiteExporter(separator)
@@ -153,12 +216,16 @@ def main():
         tflite_path = exporter.export(
             output_path=args.output,
             quantization=quant_mode,
+            converter=args.converter,
         )
         print(f"\n✅ Export complete: {tflite_path}")
         
     except ImportError as e:
         print(f"\n❌ Missing dependencies: {e}")
-        print("Please run: pip install onnx2tf tensorflow")
+        print(
+            "Please run: pip install ai-edge-torch "
+            "(or onnx2tf tensorflow for --converter onnx2tf)"
+        )
     except Exception as e:
         print(f"\n❌ Export failed: {e}")
 
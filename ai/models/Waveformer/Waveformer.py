@@ -17,6 +17,11 @@ MODEL_ROOT = Path(__file__).resolve().parent
 ASSETS_DIR = MODEL_ROOT / "assets"
 CONFIG_PATH = ASSETS_DIR / "config" / "default_config.json"
 CHECKPOINT_PATH = ASSETS_DIR / "checkpoints" / "default_ckpt.pt"
+MODEL_SAMPLE_RATE = 44100
+# Input is streamed in blocks of CHUNK_SECONDS; consecutive blocks share
+# OVERLAP_SECONDS, which is crossfaded so block seams are inaudible.
+CHUNK_SECONDS = 4.0
+OVERLAP_SECONDS = 1.0
 
 TARGETS = [
     "Acoustic_guitar",
@@ -109,14 +114,6 @@ if __name__ == "__main__":
     )
     model.to(device).eval()
 
-    # Read input audio (soundfile avoids torchcodec dependency on torchaudio 2.9)
-    mixture_np, fs = sf.read(args.input, always_2d=True)
-    mixture = torch.tensor(mixture_np.T, dtype=torch.float32)
-    if fs != 44100:
-        mixture = torchaudio.functional.resample(mixture, orig_freq=fs, new_freq=44100)
-    mixture = mixture.unsqueeze(0).to(device)
-    print("Loaded input audio from %s" % args.input)
-
     # Construct the query vector
     if len(args.targets) == 0:
         query = torch.ones(1, len(TARGETS))
@@ -124,12 +121,53 @@ if __name__ == "__main__":
         query = torch.zeros(1, len(TARGETS))
         for t in args.targets:
             query[0, TARGETS.index(t)] = 1.0
-
-    with torch.inference_mode():
-        output = model(mixture.to(device), query.to(device)).squeeze(0).cpu()
-    if fs != 44100:
-        output = torchaudio.functional.resample(output, orig_freq=44100, new_freq=fs)
-    print("Inference done. Saving output audio to %s" % args.output)
+    query = query.to(device)
 
     assert not Path(args.output).exists(), "Output file already exists."
-    sf.write(args.output, output.transpose(0, 1).numpy(), fs)
+
+    # Stream the input block by block (soundfile avoids torchcodec dependency on
+    # torchaudio 2.9) so memory stays bounded by the block size, not the file length.
+    with sf.SoundFile(args.input) as src:
+        fs = src.samplerate
+        blocksize = int(CHUNK_SECONDS * fs)
+        overlap = int(OVERLAP_SECONDS * fs)
+        fade_in = torch.linspace(0.0, 1.0, overlap)
+        fade_out = 1.0 - fade_in
+        print("Streaming input audio from %s" % args.input)
+
+        dst = None
+        tail = None
+        try:
+            for block in src.blocks(
+                blocksize=blocksize, overlap=overlap, always_2d=True, dtype="float32"
+            ):
+                mixture = torch.from_numpy(block.T.copy())
+                if fs != MODEL_SAMPLE_RATE:
+                    mixture = torchaudio.functional.resample(
+                        mixture, orig_freq=fs, new_freq=MODEL_SAMPLE_RATE
+                    )
+                with torch.inference_mode():
+                    output = model(mixture.unsqueeze(0).to(device), query).squeeze(0).cpu()
+                if fs != MODEL_SAMPLE_RATE:
+                    output = torchaudio.functional.resample(
+                        output, orig_freq=MODEL_SAMPLE_RATE, new_freq=fs
+                    )
+                # Resampling can be off by a sample; keep the block length exact
+                output = torch.nn.functional.pad(output, (0, max(0, len(block) - output.shape[-1])))
+                output = output[:, : len(block)]
+
+                if tail is not None:
+                    # The head of this block repeats the previous block's last `overlap` frames
+                    n = tail.shape[-1]
+                    output[:, :n] = tail * fade_out[:n] + output[:, :n] * fade_in[:n]
+                if dst is None:
+                    dst = sf.SoundFile(args.output, "w", samplerate=fs, channels=output.shape[0])
+                dst.write(output[:, : max(0, output.shape[-1] - overlap)].transpose(0, 1).numpy())
+                tail = output[:, max(0, output.shape[-1] - overlap):]
+
+            if tail is not None:
+                dst.write(tail.transpose(0, 1).numpy())
+        finally:
+            if dst is not None:
+                dst.close()
+    print("Inference done. Saved output audio to %s" % args.output)
@@ -30,17 +30,25 @@ class PositionalEncoding(nn.Module):
         self.dropout = nn.Dropout(p=dropout)
         
         # Create positional encoding matrix
-        pe = torch.zeros(max_len, d_model)
         position = torch.arange(0, max_len, dtype=torch.float).unsqueeze(1)
         div_term = torch.exp(
             torch.arange(0, d_model, 2).float() * (-math.log(10000.0) / d_model)
         )
+        angles = position * div_term
         
-        pe[:, 0::2] = torch.sin(position * div_term)
-        pe[:, 1::2] = torch.cos(position * div_term)
+        # polar() gives cos + j*sin; viewed as real that is [..., (cos, sin)] pairs.
+        # Flip each pair to get the interleaved [sin, cos] layout in one contiguous write.
+        pe = torch.view_as_real(torch.polar(torch.ones_like(angles), angles))
+        pe = pe.flip(-1).flatten(-2)
         pe = pe.unsqueeze(0)  # Add batch dimension
         
-        self.register_buffer('pe', pe)
+        # Deterministic table: rebuilt here, so keep it out of saved state_dicts
+        self.register_buffer('pe', pe, persistent=False)
+
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # Older checkpoints stored 'pe'; drop it so strict loading still succeeds.
+        state_dict.pop(prefix + 'pe', None)
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
     
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         """
@@ -53,8 +61,10 @@ class PositionalEncoding(nn.Module):
             Output with positional encoding added
         """
         # x shape: [batch_size, seq_len, d_model]
-        x = x + self.pe[:, :x.size(1), :]
-        return self.dropout(x)
+        # Match x's dtype so the add stays in FP16/BF16 under autocast
+        x = x + self.pe[:, :x.size(1), :].to(x.dtype)
+        # Dropout is the identity in eval(); skip the extra dispatch
+        return self.dropout(x) if self.training else x
 
 
 __all__ = ["PositionalEncoding"]
@@ -1,6 +1,7 @@
 import shutil
 import sys
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 _root = Path(__file__).resolve().parents[3]
@@ -21,6 +22,8 @@ WAVEFORMER_URL = "https://targetsound.cs.washington.edu/files/experiments.zip"
 YAMNET_URL = "https://tfhub.dev/google/yamnet/1?tf-hub-format=compressed"
 YAMNET_CLASS_MAP_URL = "https://raw.githubusercontent.com/tensorflow/models/master/research/audioset/yamnet/yamnet_class_map.csv"
 
+COPY_BUFFER_BYTES = 1 << 20  # 1 MiB chunks instead of copyfileobj's 64 KiB default
+
 
 def download(url: str, dest: Path) -> None:
     dest.parent.mkdir(parents=True, exist_ok=True)
@@ -28,14 +31,23 @@ def download(url: str, dest: Path) -> None:
         print(f"[skip] {dest.name} already exists")
         return
     print(f"[download] {url} -> {dest}")
-    with urllib.request.urlopen(url) as resp, dest.open("wb") as f:
-        shutil.copyfileobj(resp, f)
+    # Stream into a .part file so an interrupted run isn't mistaken for a finished one
+    partial = dest.with_name(dest.name + ".part")
+    with urllib.request.urlopen(url, timeout=30) as resp, partial.open("wb") as f:
+        shutil.copyfileobj(resp, f, COPY_BUFFER_BYTES)
+    partial.replace(dest)
 
 
 def main() -> None:
-    download(WAVEFORMER_URL, WAVEFORMER_ARCHIVE)
-    download(YAMNET_URL, YAMNET_ARCHIVE)
-    download(YAMNET_CLASS_MAP_URL, YAMNET_CLASS_MAP)
+    jobs = [
+        (WAVEFORMER_URL, WAVEFORMER_ARCHIVE),
+        (YAMNET_URL, YAMNET_ARCHIVE),
+        (YAMNET_CLASS_MAP_URL, YAMNET_CLASS_MAP),
+    ]
+    # Independent hosts, so fetch them concurrently; result() re-raises any failure
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        for future in [pool.submit(download, url, dest) for url, dest in jobs]:
+            future.result()
     print("Downloads completed.")
 
 
@@ -9,6 +9,7 @@ import pytest
 
 LEGACY_ARTIFACT_TEST_FILES = {
     "test_waveformer_separator.py",
+    "test_waveformer_onnx_export.py",
 }
 
 
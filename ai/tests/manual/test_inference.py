@@ -11,7 +11,9 @@ __test__ = False
 import csv
 import subprocess
 import sys
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 import soundfile as sf
@@ -25,18 +27,33 @@ WAVEFORMER_DIR = ROOT / "ai" / "models" / "Waveformer"
 YAMNET_DIR = ROOT / "ai" / "models" / "YAMNet"
 YAMNET_MODEL_DIR = YAMNET_DIR / "saved_models" / "yamnet_1"
 YAMNET_CLASS_MAP_PATH = YAMNET_DIR / "metadata" / "yamnet_class_map.csv"
+YAMNET_SAMPLE_RATE = 16000
+WAVEFORMER_SAMPLE_RATE = 44100
 
 
-def generate_test_audio(path: Path, sample_rate: int = 44100, seconds: float = 1.0) -> None:
+def generate_test_audio(path: Path, sample_rate: int = 44100, seconds: float = 1.0) -> np.ndarray:
     samples = int(sample_rate * seconds)
-    waveform = np.random.normal(0, 0.05, size=(samples,)).astype(np.float32)
+    waveform = np.random.default_rng().normal(0, 0.05, size=(samples,)).astype(np.float32)
     sf.write(path, waveform, sample_rate)
+    return waveform
 
 
-def run_waveformer_test() -> None:
+@lru_cache(maxsize=1)
+def load_yamnet():
+    try:
+        return hub.load(str(YAMNET_MODEL_DIR))
+    except Exception:
+        return hub.load("https://tfhub.dev/google/yamnet/1")
+
+
+def run_waveformer_test(waveform_16k: Optional[np.ndarray] = None) -> None:
     input_wav = SCRIPTS_DIR / "sample_noise.wav"
     output_wav = SCRIPTS_DIR / "sample_waveformer_out.wav"
-    generate_test_audio(input_wav)
+    if waveform_16k is None:
+        generate_test_audio(input_wav, sample_rate=WAVEFORMER_SAMPLE_RATE)
+    else:
+        # 16 kHz -> 44.1 kHz is exactly 441/160; one polyphase pass, no FFT
+        sf.write(input_wav, signal.resample_poly(waveform_16k, 441, 160), WAVEFORMER_SAMPLE_RATE)
     if output_wav.exists():
         output_wav.unlink()
 
@@ -46,34 +63,29 @@ def run_waveformer_test() -> None:
         raise FileNotFoundError("Waveformer output not produced.")
 
 
-def run_yamnet_test() -> None:
-    yamnet_path = YAMNET_MODEL_DIR
+def run_yamnet_test(waveform: Optional[np.ndarray] = None) -> None:
+    """Run YAMNet on ``waveform`` (16 kHz mono) or, if omitted, on ``sample_noise.wav``."""
     class_map_path = YAMNET_CLASS_MAP_PATH
-    fallback_class_map = yamnet_path / "assets" / "yamnet_class_map.csv"
+    fallback_class_map = YAMNET_MODEL_DIR / "assets" / "yamnet_class_map.csv"
     if not class_map_path.exists() and fallback_class_map.exists():
         class_map_path = fallback_class_map
     if not class_map_path.exists():
         class_map_path.parent.mkdir(parents=True, exist_ok=True)
         with class_map_path.open("w", newline="") as f:
             f.write("index,display_name\n0,silence\n")
-    input_wav = SCRIPTS_DIR / "sample_noise.wav"
 
-    if not input_wav.exists():
-        generate_test_audio(input_wav, sample_rate=16000)
-
-    waveform, sr = sf.read(input_wav)
-    target_sr = 16000
-    if sr != target_sr:
-        waveform = signal.resample(waveform, int(len(waveform) * target_sr / sr))
+    if waveform is None:
+        input_wav = SCRIPTS_DIR / "sample_noise.wav"
+        if not input_wav.exists():
+            generate_test_audio(input_wav, sample_rate=YAMNET_SAMPLE_RATE)
+        waveform, sr = sf.read(input_wav, dtype="float32")
+        if waveform.ndim > 1:
+            waveform = waveform.mean(axis=1)
+        if sr != YAMNET_SAMPLE_RATE:
+            waveform = signal.resample_poly(waveform, YAMNET_SAMPLE_RATE, sr)
 
     waveform = tf.convert_to_tensor(waveform, dtype=tf.float32)
-    if len(waveform.shape) > 1:
-        waveform = tf.reduce_mean(waveform, axis=1)
-
-    try:
-        yamnet_model = hub.load(str(yamnet_path))
-    except Exception:
-        yamnet_model = hub.load("https://tfhub.dev/google/yamnet/1")
+    yamnet_model = load_yamnet()
     scores, _, _ = yamnet_model(waveform)
     scores_np = scores.numpy()
     top_class = int(np.argmax(np.mean(scores_np, axis=0)))
@@ -85,8 +97,10 @@ def run_yamnet_test() -> None:
 
 
 def main() -> None:
-    run_waveformer_test()
-    run_yamnet_test()
+    # One 16 kHz source: YAMNet uses it as-is, Waveformer gets a single upsampled copy
+    waveform_16k = generate_test_audio(SCRIPTS_DIR / "sample_noise_16k.wav", sample_rate=YAMNET_SAMPLE_RATE)
+    run_waveformer_test(waveform_16k)
+    run_yamnet_test(waveform_16k)
 
 
 if __name__ == "__main__":
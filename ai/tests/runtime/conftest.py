@@ -0,0 +1,78 @@
+"""Shared YAMNet fakes for the detection runtime tests."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+HUB_LOAD = "ai.ai_runtime.detection.semantic_detective.hub.load"
+
+CLASS_MAP_YAML = """\
+categories:
+  speech:
+    indices: [0]
+    priority: medium
+  wind:
+    indices: [310]
+    priority: low
+  siren:
+    indices: [396]
+    priority: medium
+"""
+
+
+class FakeYamnet:
+    """Deterministic stand-in for tfhub YAMNet to avoid network calls."""
+
+    def __init__(self):
+        # Imported here, not at module top: this conftest loads for every runtime test.
+        import tensorflow as tf
+
+        # Scores shaped (frames, 521), a single frame for simplicity. SemanticDetective
+        # only reads them, so the tensor is built once and returned on every call.
+        scores = np.zeros((1, 521), dtype=np.float32)
+        scores[0, 0] = 0.8  # speech bucket
+        scores[0, 310] = 0.1  # wind
+        scores[0, 396] = 0.95  # siren/alarm
+        self._scores = tf.constant(scores)
+
+    def __call__(self, waveform):
+        # waveform shape: (T,)
+        return self._scores, None, None
+
+
+def write_class_map(directory: Path) -> Path:
+    path = directory / "yamnet_map.yaml"
+    path.write_text(CLASS_MAP_YAML)
+    return path
+
+
+@pytest.fixture(scope="session")
+def fake_yamnet() -> FakeYamnet:
+    # Skip rather than error where the TF stack is not installed
+    pytest.importorskip("tensorflow")
+    pytest.importorskip("tensorflow_hub")
+    return FakeYamnet()
+
+
+@pytest.fixture
+def fake_hub(fake_yamnet):
+    """Patch ``hub.load`` in semantic_detective to return the shared FakeYamnet."""
+    # A plain function rather than a MagicMock: every detective gets the same instance
+    with patch(HUB_LOAD, new=lambda *args, **kwargs: fake_yamnet) as load:
+        yield load
+
+
+@pytest.fixture(scope="session")
+def silence_audio() -> np.ndarray:
+    """One second of 16 kHz silence. Shared across tests: copy before mutating."""
+    return np.zeros(16000, dtype=np.float32)
+
+
+@pytest.fixture(scope="session")
+def class_map(tmp_path_factory) -> Path:
+    # Read-only for SemanticDetective, so one file serves every test
+    return write_class_map(tmp_path_factory.mktemp("class_map"))
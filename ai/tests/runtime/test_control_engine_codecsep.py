@@ -1,24 +1,50 @@
-"""ControlEngine tests for CodecSep-related suppression params."""
+"""ControlEngine tests for CodecSep-related suppression params and thread safety."""
 
 from __future__ import annotations
 
+import threading
+from unittest.mock import MagicMock
+
 import numpy as np
+import pytest
 
 from ai.ai_runtime.profiles import ControlEngine, ProfileManager
 
+pytestmark = pytest.mark.xdist_group("profiles")
+
+_TYPING_CATEGORIES = frozenset({"typing"})
+_WIND_CATEGORIES = frozenset({"wind"})
+
+
+@pytest.fixture(scope="module")
+def profile_manager(tmp_path_factory):
+    # System profiles are read from disk once per module; each test only adds its own profile.
+    return ProfileManager(profiles_dir=tmp_path_factory.mktemp("profiles"))
+
+
+@pytest.fixture(autouse=True)
+def _reset_user_profiles(profile_manager):
+    # The manager outlives each test, so drop whatever profiles the test created.
+    yield
+    for profile in profile_manager.get_user_profiles():
+        profile_manager.delete_profile(profile.id)
 
-class CaptureSuppressor:
-    def __init__(self):
-        self.calls: list[dict] = []
 
-    def suppress(self, **kwargs):
-        self.calls.append(kwargs)
-        return kwargs["audio"]
+@pytest.fixture
+def suppressor():
+    # spec by attribute name: importing SemanticSuppressor itself would pull in torch.
+    mock = MagicMock(spec=["suppress"])
+    mock.suppress.side_effect = lambda **kwargs: kwargs["audio"]
+    return mock
 
 
-def test_control_engine_forwards_codecsep_suppression_params(tmp_path):
-    manager = ProfileManager(profiles_dir=tmp_path / "profiles")
-    profile = manager.create_profile(
+@pytest.fixture
+def engine(profile_manager, suppressor):
+    return ControlEngine(profile_manager=profile_manager, suppressor=suppressor)
+
+
+def test_control_engine_forwards_codecsep_suppression_params(profile_manager, suppressor, engine):
+    profile = profile_manager.create_profile(
         name="CodecSep Profile",
         suppressions={"typing": True},
         suppression_params={
@@ -38,16 +64,14 @@ def test_control_engine_forwards_codecsep_suppression_params(tmp_path):
             "codecsep_fixed_merge_policy": "sum",
         },
     )
-    suppressor = CaptureSuppressor()
-    engine = ControlEngine(profile_manager=manager, suppressor=suppressor)
     engine.set_profile(profile)
 
     audio = np.zeros(1600, dtype=np.float32)
     out = engine.process_audio(audio, 16000)
 
     assert np.array_equal(out, audio)
-    assert len(suppressor.calls) == 1
-    call = suppressor.calls[0]
+    suppressor.suppress.assert_called_once()
+    call = suppressor.suppress.call_args.kwargs
     assert call["suppress_categories"] == ["typing"]
     assert call["separator_backend"] == "codecsep"
     assert call["masking_method"] == "cirm"
@@ -63,9 +87,8 @@ def test_control_engine_forwards_codecsep_suppression_params(tmp_path):
     assert call["codecsep_fixed_merge_policy"] == "sum"
 
 
-def test_control_engine_forwards_audiosep_hive15cat_suppression_params(tmp_path):
-    manager = ProfileManager(profiles_dir=tmp_path / "profiles")
-    profile = manager.create_profile(
+def test_control_engine_forwards_audiosep_hive15cat_suppression_params(profile_manager, suppressor, engine):
+    profile = profile_manager.create_profile(
         name="AudioSep15 Profile",
         suppressions={"keyboard typing": True},
         suppression_params={
@@ -78,16 +101,14 @@ def test_control_engine_forwards_audiosep_hive15cat_suppression_params(tmp_path)
             "audiosep_hive15cat_realtime_hop_seconds": 1.25,
         },
     )
-    suppressor = CaptureSuppressor()
-    engine = ControlEngine(profile_manager=manager, suppressor=suppressor)
     engine.set_profile(profile)
 
     audio = np.zeros(1600, dtype=np.float32)
     out = engine.process_audio(audio, 16000)
 
     assert np.array_equal(out, audio)
-    assert len(suppressor.calls) == 1
-    call = suppressor.calls[0]
+    suppressor.suppress.assert_called_once()
+    call = suppressor.suppress.call_args.kwargs
     assert call["suppress_categories"] == ["keyboard typing"]
     assert call["separator_backend"] == "audiosep_hive15cat"
     assert call["masking_method"] == "cirm"
@@ -96,9 +117,8 @@ def test_control_engine_forwards_audiosep_hive15cat_suppression_params(tmp_path)
     assert call["audiosep_hive15cat_realtime_hop_seconds"] == 1.25
 
 
-def test_control_engine_forwards_codecsep_dnrv2_15cat_suppression_params(tmp_path):
-    manager = ProfileManager(profiles_dir=tmp_path / "profiles")
-    profile = manager.create_profile(
+def test_control_engine_forwards_codecsep_dnrv2_15cat_suppression_params(profile_manager, suppressor, engine):
+    profile = profile_manager.create_profile(
         name="CodecSep15 Profile",
         suppressions={"alarm": True},
         suppression_params={
@@ -112,16 +132,14 @@ def test_control_engine_forwards_codecsep_dnrv2_15cat_suppression_params(tmp_pat
             "codecsep_dnrv2_15cat_realtime_hop_seconds": 0.5,
         },
     )
-    suppressor = CaptureSuppressor()
-    engine = ControlEngine(profile_manager=manager, suppressor=suppressor)
     engine.set_profile(profile)
 
     audio = np.zeros(1600, dtype=np.float32)
     out = engine.process_audio(audio, 16000)
 
     assert np.array_equal(out, audio)
-    assert len(suppressor.calls) == 1
-    call = suppressor.calls[0]
+    suppressor.suppress.assert_called_once()
+    call = suppressor.suppress.call_args.kwargs
     assert call["suppress_categories"] == ["alarm"]
     assert call["separator_backend"] == "codecsep_dnrv2_15cat"
     assert call["masking_method"] == "wiener_dd"
@@ -129,3 +147,41 @@ def test_control_engine_forwards_codecsep_dnrv2_15cat_suppression_params(tmp_pat
     assert call["codecsep_dnrv2_15cat_runtime"] == "executorch"
     assert call["codecsep_dnrv2_15cat_device"] == "cpu"
     assert call["codecsep_dnrv2_15cat_realtime_hop_seconds"] == 0.5
+
+
+@pytest.mark.slow
+def test_concurrent_access_thread_safety(profile_manager, suppressor, engine):
+    typing_profile = profile_manager.create_profile(name="Typing", suppressions={"typing": True})
+    wind_profile = profile_manager.create_profile(name="Wind", suppressions={"wind": True})
+    engine.set_profile(typing_profile)
+    audio = np.zeros(160, dtype=np.float32)
+    errors: list[BaseException] = []
+
+    def process_loop():
+        try:
+            for _ in range(200):
+                engine.process_audio(audio, 16000)
+        except BaseException as exc:  # pragma: no cover - surfaced by the assertion below
+            errors.append(exc)
+
+    def switch_loop():
+        try:
+            for i in range(200):
+                engine.set_profile(wind_profile if i % 2 else typing_profile)
+        except BaseException as exc:  # pragma: no cover - surfaced by the assertion below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=process_loop) for _ in range(4)]
+    threads.append(threading.Thread(target=switch_loop))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10.0)
+
+    assert not errors
+    calls = suppressor.suppress.call_args_list
+    assert len(calls) == 4 * 200
+    assert all(
+        frozenset(call.kwargs["suppress_categories"]) in (_TYPING_CATEGORIES, _WIND_CATEGORIES)
+        for call in calls
+    )
@@ -1,47 +1,14 @@
 """Unit tests for DetectionThread background classification."""
 
-import time
-from pathlib import Path
-from unittest.mock import MagicMock, patch
+import threading
+from unittest.mock import MagicMock
 
 import numpy as np
-import tensorflow as tf
 
 from ai.ai_runtime.detection import AdaptiveDutyCycle, DetectionThread, SemanticDetective
 
 
-class FakeYamnet:
-    """Deterministic stand-in for tfhub YAMNet to avoid network calls."""
-
-    def __call__(self, waveform):
-        scores = np.zeros((1, 521), dtype=np.float32)
-        scores[0, 0] = 0.8
-        scores[0, 310] = 0.1
-        scores[0, 396] = 0.95
-        return tf.constant(scores), None, None
-
-
-def make_class_map(tmp_path: Path) -> Path:
-    yaml_content = """\
-categories:
-  speech:
-    indices: [0]
-    priority: medium
-  wind:
-    indices: [310]
-    priority: low
-  siren:
-    indices: [396]
-    priority: medium
-"""
-    path = tmp_path / "yamnet_map.yaml"
-    path.write_text(yaml_content)
-    return path
-
-
-@patch("ai.ai_runtime.detection.semantic_detective.hub.load", return_value=FakeYamnet())
-def test_detection_thread_init(mock_load, tmp_path: Path):
-    class_map = make_class_map(tmp_path)
+def test_detection_thread_init(fake_hub, class_map):
     detective = SemanticDetective(class_map_path=class_map)
     get_audio = MagicMock(return_value=None)
     callback = MagicMock()
@@ -56,67 +23,74 @@ def test_detection_thread_init(mock_load, tmp_path: Path):
     assert thread.daemon is True
 
 
-@patch("ai.ai_runtime.detection.semantic_detective.hub.load", return_value=FakeYamnet())
-def test_detection_thread_stop(mock_load, tmp_path: Path):
-    class_map = make_class_map(tmp_path)
+def test_detection_thread_stop(fake_hub, class_map):
     detective = SemanticDetective(class_map_path=class_map)
     thread = DetectionThread(
-        get_audio=MagicMock(return_value=None),
+        get_audio=lambda: None,
         detective=detective,
-        callback=MagicMock(),
+        callback=lambda payload: None,
         base_interval=0.1,
     )
     thread.start()
-    time.sleep(0.05)
+    assert thread._loop_started.wait(timeout=1.0)
     thread.stop()
     thread.join(timeout=1.0)
     assert not thread.is_alive()
 
 
-@patch("ai.ai_runtime.detection.semantic_detective.hub.load", return_value=FakeYamnet())
-def test_detection_thread_callback_invoked(mock_load, tmp_path: Path):
-    class_map = make_class_map(tmp_path)
+def test_detection_thread_callback_invoked(fake_hub, class_map, silence_audio):
     detective = SemanticDetective(class_map_path=class_map)
-    audio = np.zeros(16000, dtype=np.float32)
-    get_audio = MagicMock(return_value=(audio, 16000))
-    callback = MagicMock()
+    # Plain closures, not MagicMock: both run on every loop iteration
+    polls = []
+    payloads = []
+    done = threading.Event()
+
+    def get_audio():
+        polls.append(1)
+        return (silence_audio, 16000)
+
+    def callback(payload):
+        payloads.append(payload)
+        done.set()
+
     thread = DetectionThread(
         get_audio=get_audio,
         detective=detective,
         callback=callback,
-        base_interval=0.05,
+        base_interval=0.001,
     )
     thread.start()
-    time.sleep(0.2)
+    assert done.wait(timeout=1.0)
     thread.stop()
     thread.join(timeout=1.0)
-    assert callback.call_count >= 1
-    payload = callback.call_args[0][0]
+    assert len(polls) >= 1
+    payload = payloads[0]
     assert "raw" in payload
     assert "smoothed" in payload
     assert "top" in payload
 
 
-@patch("ai.ai_runtime.detection.semantic_detective.hub.load", return_value=FakeYamnet())
-def test_detection_thread_handles_classification_error(mock_load, tmp_path: Path):
-    class_map = make_class_map(tmp_path)
+def test_detection_thread_handles_classification_error(fake_hub, class_map):
     detective = SemanticDetective(class_map_path=class_map)
     call_count = [0]
+    # Set on the poll after the failing one: the loop survived the exception
+    recovered = threading.Event()
 
     def get_audio_with_error():
         call_count[0] += 1
         if call_count[0] == 1:
             return (np.array([], dtype=np.float32), 16000)
+        recovered.set()
         return None
 
     thread = DetectionThread(
         get_audio=get_audio_with_error,
         detective=detective,
-        callback=MagicMock(),
-        base_interval=0.05,
+        callback=lambda payload: None,
+        base_interval=0.001,
     )
     thread.start()
-    time.sleep(0.15)
+    assert recovered.wait(timeout=1.0)
     thread.stop()
     thread.join(timeout=1.0)
     assert not thread.is_alive()
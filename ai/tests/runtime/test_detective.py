@@ -1,9 +1,10 @@
 """Unit tests for SemanticDetective and temporal smoothing components."""
 
+import threading
+import time
+
 import numpy as np
 import pytest
-import tensorflow as tf
-from pathlib import Path
 from unittest.mock import patch
 
 from ai.ai_runtime.detection.semantic_detective import (
@@ -15,44 +16,50 @@ from ai.ai_runtime.detection.semantic_detective import (
 )
 
 
-class FakeYamnet:
-    """Deterministic stand-in for tfhub YAMNet to avoid network calls."""
-
-    def __call__(self, waveform):
-        # waveform shape: (T,)
-        # Return scores shaped (frames, 521). Use a single frame for simplicity.
-        scores = np.zeros((1, 521), dtype=np.float32)
-        scores[0, 0] = 0.8  # speech bucket
-        scores[0, 310] = 0.1  # wind
-        scores[0, 396] = 0.95  # siren/alarm
-        return tf.constant(scores), None, None
-
-
-def make_class_map(tmp_path: Path) -> Path:
-    yaml_content = """\
+EMPTY_MAP_YAML = """\
 categories:
+  empty_cat:
+    indices: []
+    priority: low
   speech:
     indices: [0]
     priority: medium
-  wind:
-    indices: [310]
+"""
+
+BAD_MAP_YAML = """\
+categories:
+  bad_cat:
+    indices: [521]
     priority: low
-  siren:
-    indices: [396]
-    priority: medium
 """
-    path = tmp_path / "yamnet_map.yaml"
-    path.write_text(yaml_content)
-    return path
 
 
-@patch("ai.ai_runtime.detection.semantic_detective.hub.load", return_value=FakeYamnet())
-def test_classify_maps_categories(mock_load, tmp_path: Path):
-    class_map = make_class_map(tmp_path)
-    detective = SemanticDetective(class_map_path=class_map, enable_median=False)
-    audio = np.zeros(16000, dtype=np.float32)
+@pytest.fixture(scope="module")
+def edge_case_maps(tmp_path_factory):
+    """Write the edge-case class maps once per module."""
+    directory = tmp_path_factory.mktemp("edge_case_maps")
+    maps = {}
+    for name, content in (("empty", EMPTY_MAP_YAML), ("bad", BAD_MAP_YAML)):
+        maps[name] = directory / f"{name}_map.yaml"
+        maps[name].write_text(content)
+    return maps
 
-    result = detective.classify(audio, sample_rate=16000)
+
+@pytest.fixture(scope="module")
+def detective(class_map, fake_yamnet):
+    # Construction (class-map parse, YAMNet wrap + warm-up) is the costly part, so build
+    # one detective per module. With enable_median=False, "raw" and "smoothed" are
+    # stateless, which is all the tests sharing this fixture look at.
+    with patch(
+        "ai.ai_runtime.detection.semantic_detective.hub.load",
+        new=lambda *args, **kwargs: fake_yamnet,
+    ):
+        shared = SemanticDetective(class_map_path=class_map, enable_median=False)
+    return shared
+
+
+def test_classify_maps_categories(detective, silence_audio):
+    result = detective.classify(silence_audio, sample_rate=16000)
 
     raw = result["raw"]
     assert raw["speech"] == pytest.approx(0.8, rel=1e-6)
@@ -60,34 +67,70 @@ def test_classify_maps_categories(mock_load, tmp_path: Path):
     assert raw["siren"] == pytest.approx(0.95, rel=1e-6)
 
 
-def test_confidence_buffer_majority_vote():
-    """Test that majority voting requires (window_size + 1) // 2 hits."""
-    buffer = ConfidenceBuffer(window_size=3, threshold=0.5)
-    # With window_size=3, need at least 2 hits for majority ((3+1)//2 = 2)
-
-    # Frame 1: below threshold -> history=[False], hits=0, stable=False
-    outputs = buffer.update({"speech": 0.4})
-    assert outputs["speech"] is False
-
-    # Frame 2: below threshold -> history=[False, False], hits=0, stable=False
-    outputs = buffer.update({"speech": 0.4})
-    assert outputs["speech"] is False
-
-    # Frame 3: above threshold -> history=[False, False, True], hits=1, stable=False
-    outputs = buffer.update({"speech": 0.7})
-    assert outputs["speech"] is False
-
-    # Frame 4: above threshold -> history=[False, True, True], hits=2, stable=True
-    outputs = buffer.update({"speech": 0.8})
-    assert outputs["speech"] is True
-
-
-def test_schmitt_trigger_hysteresis():
-    trigger = SchmittTrigger(on_threshold=0.7, off_threshold=0.4)
-    assert trigger.update("siren", 0.6) is False  # below on threshold
-    assert trigger.update("siren", 0.72) is True  # turn on
-    assert trigger.update("siren", 0.5) is True  # stays on
-    assert trigger.update("siren", 0.3) is False  # turns off
+# Stateful smoothers as step tables: (name, factory, step, [(input, expected), ...]).
+# Every sequence starts from a fresh instance; failures name the offending step.
+STATEFUL_CASES = [
+    (
+        # Majority voting needs (window_size + 1) // 2 = 2 hits with window_size=3:
+        # [F] -> [F, F] -> [F, F, T] (1 hit) -> [F, T, T] (2 hits, stable)
+        "buffer_majority_vote",
+        lambda: ConfidenceBuffer(window_size=3, threshold=0.5),
+        lambda buffer, value: buffer.update({"speech": value})["speech"],
+        [(0.4, False), (0.4, False), (0.7, False), (0.8, True)],
+    ),
+    (
+        # A new category starts with an empty history: one hit is not enough, two are
+        "buffer_new_category",
+        lambda: ConfidenceBuffer(window_size=3, threshold=0.5),
+        lambda buffer, value: buffer.update({"new_cat": value})["new_cat"],
+        [(0.9, False), (0.9, True)],
+    ),
+    (
+        # Below on -> turn on -> stays on above off -> turns off below off
+        "schmitt_hysteresis",
+        lambda: SchmittTrigger(on_threshold=0.7, off_threshold=0.4),
+        lambda trigger, value: trigger.update("siren", value),
+        [(0.6, False), (0.72, True), (0.5, True), (0.3, False)],
+    ),
+    (
+        # Warm-up medians use only the frames seen so far: [0.8], [0.8, 0.2], [0.8, 0.2, 0.5]
+        "median_window",
+        lambda: MedianSmoother(window_size=3),
+        lambda smoother, value: smoother.smooth({"speech": value})["speech"],
+        [(0.8, pytest.approx(0.8)), (0.2, pytest.approx(0.5)), (0.5, pytest.approx(0.5))],
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    ("factory", "step", "sequence"),
+    [pytest.param(*case[1:], id=case[0]) for case in STATEFUL_CASES],
+)
+def test_stateful_smoothers(factory, step, sequence):
+    smoother = factory()
+    for index, (value, expected) in enumerate(sequence):
+        result = step(smoother, value)
+        # Flags must be Python bools, not NumPy ones
+        if isinstance(expected, bool):
+            assert result is expected, f"step {index}: {value!r} -> {result!r}"
+        else:
+            assert result == expected, f"step {index}: {value!r} -> {result!r}"
+
+
+def test_vector_smoothing_matches_dict_path():
+    rng = np.random.default_rng(0)
+    names = ["speech", "wind", "siren"]
+    median, median_vec = MedianSmoother(), MedianSmoother()
+    buffer, buffer_vec = ConfidenceBuffer(), ConfidenceBuffer()
+    trigger, trigger_vec = SchmittTrigger(), SchmittTrigger()
+    for _ in range(20):
+        frame = rng.random(len(names))
+        smoothed = median.smooth(dict(zip(names, frame.tolist())))
+        smoothed_vec = median_vec.smooth_vec(frame)
+        assert list(smoothed.values()) == pytest.approx(smoothed_vec.tolist())
+        assert list(buffer.update(smoothed).values()) == buffer_vec.update_vec(smoothed_vec).tolist()
+        states = [trigger.update(name, smoothed[name]) for name in names]
+        assert states == trigger_vec.update_vec(smoothed_vec).tolist()
 
 
 def test_schmitt_trigger_invalid_thresholds():
@@ -99,59 +142,35 @@ def test_schmitt_trigger_invalid_thresholds():
         SchmittTrigger(on_threshold=0.3, off_threshold=0.7)  # Inverted
 
 
-def test_adaptive_duty_cycle():
-    cycle = AdaptiveDutyCycle()
-    assert cycle.get_interval(75) == 3.0
-    assert cycle.get_interval(35) == 8.0
-    assert cycle.get_interval(10) == 15.0
-
-
-def test_adaptive_duty_cycle_clamps_battery():
-    """Test that out-of-range battery values are clamped to 0-100."""
-    cycle = AdaptiveDutyCycle()
-    # Values above 100 should clamp to 100 (normal interval)
-    assert cycle.get_interval(150) == 3.0
-    # Negative values should clamp to 0 (critical interval)
-    assert cycle.get_interval(-10) == 15.0
-
-
-def test_median_smoother():
-    smoother = MedianSmoother(window_size=3)
-    # First value is just the value itself
-    result = smoother.smooth({"speech": 0.8})
-    assert result["speech"] == pytest.approx(0.8)
-    # Add more values
-    smoother.smooth({"speech": 0.2})
-    result = smoother.smooth({"speech": 0.5})
-    # Median of [0.8, 0.2, 0.5] = 0.5
-    assert result["speech"] == pytest.approx(0.5)
-
-
-def test_confidence_buffer_new_category():
-    buffer = ConfidenceBuffer(window_size=3, threshold=0.5)
-    # New category should start with empty history
-    result = buffer.update({"new_cat": 0.9})
-    # Only one hit, needs 2 for stable
-    assert result["new_cat"] is False
-    result = buffer.update({"new_cat": 0.9})
-    # Now has 2 hits
-    assert result["new_cat"] is True
-
-
-@patch("ai.ai_runtime.detection.semantic_detective.hub.load", return_value=FakeYamnet())
-def test_classify_empty_audio_raises(mock_load, tmp_path: Path):
-    class_map = make_class_map(tmp_path)
-    detective = SemanticDetective(class_map_path=class_map, enable_median=False)
+@pytest.fixture(scope="module")
+def cycle():
+    # get_interval is stateless, so one instance serves every case
+    return AdaptiveDutyCycle()
+
+
+@pytest.mark.parametrize(
+    ("battery", "expected"),
+    [
+        (75, 3.0),
+        (35, 8.0),
+        (10, 15.0),
+        # Out-of-range battery values are clamped to 0-100
+        pytest.param(150, 3.0, id="clamp_high"),
+        pytest.param(-10, 15.0, id="clamp_low"),
+    ],
+)
+def test_adaptive_duty_cycle(cycle, battery, expected):
+    assert cycle.get_interval(battery) == expected
+
+
+def test_classify_empty_audio_raises(detective):
     empty_audio = np.array([], dtype=np.float32)
 
     with pytest.raises(ValueError, match="empty"):
         detective.classify(empty_audio, sample_rate=16000)
 
 
-@patch("ai.ai_runtime.detection.semantic_detective.hub.load", return_value=FakeYamnet())
-def test_classify_stereo_audio(mock_load, tmp_path: Path):
-    class_map = make_class_map(tmp_path)
-    detective = SemanticDetective(class_map_path=class_map, enable_median=False)
+def test_classify_stereo_audio(detective):
     # Stereo audio (samples, 2 channels)
     stereo_audio = np.zeros((16000, 2), dtype=np.float32)
 
@@ -160,13 +179,38 @@ def test_classify_stereo_audio(mock_load, tmp_path: Path):
     assert "raw" in result
 
 
-@patch("ai.ai_runtime.detection.semantic_detective.hub.load", return_value=FakeYamnet())
-def test_get_top_detections(mock_load, tmp_path: Path):
-    class_map = make_class_map(tmp_path)
-    detective = SemanticDetective(class_map_path=class_map, enable_median=False)
-    audio = np.zeros(16000, dtype=np.float32)
+def test_classify_stream_matches_classify(fake_hub, class_map):
+    streamed = SemanticDetective(class_map_path=class_map, enable_median=False)
+    direct = SemanticDetective(class_map_path=class_map, enable_median=False)
+    chunks = [np.zeros(48000, dtype=np.float32) for _ in range(4)]
+
+    results = list(streamed.classify_stream(iter(chunks), sample_rate=48000))
+
+    assert results == [direct.classify(chunk, sample_rate=48000) for chunk in chunks]
+    with pytest.raises(ValueError, match="empty"):
+        list(streamed.classify_stream([np.array([], dtype=np.float32)], sample_rate=16000))
+
+
+def test_classify_stream_close_does_not_wait_on_blocked_source(detective, silence_audio):
+    release = threading.Event()
 
-    result = detective.classify(audio, sample_rate=16000)
+    def live_source():
+        yield silence_audio
+        release.wait()  # a live input that has stopped producing
+        yield silence_audio
+
+    stream = detective.classify_stream(live_source(), sample_rate=16000)
+    try:
+        next(stream)
+        start = time.monotonic()
+        stream.close()
+        assert time.monotonic() - start < 1.0
+    finally:
+        release.set()
+
+
+def test_get_top_detections(detective, silence_audio):
+    result = detective.classify(silence_audio, sample_rate=16000)
     top = detective.get_top_detections(result["smoothed"], n=2)
 
     assert len(top) == 2
@@ -175,40 +219,16 @@ def test_get_top_detections(mock_load, tmp_path: Path):
     assert top[1][0] == "speech"
 
 
-@patch("ai.ai_runtime.detection.semantic_detective.hub.load", return_value=FakeYamnet())
-def test_empty_category_indices(mock_load, tmp_path: Path):
+def test_empty_category_indices(fake_hub, edge_case_maps, silence_audio):
     """Test that empty category indices return 0.0 instead of NaN."""
-    yaml_content = """\
-categories:
-  empty_cat:
-    indices: []
-    priority: low
-  speech:
-    indices: [0]
-    priority: medium
-"""
-    path = tmp_path / "empty_map.yaml"
-    path.write_text(yaml_content)
-
-    detective = SemanticDetective(class_map_path=path, enable_median=False)
-    audio = np.zeros(16000, dtype=np.float32)
-    result = detective.classify(audio, sample_rate=16000)
+    detective = SemanticDetective(class_map_path=edge_case_maps["empty"], enable_median=False)
+    result = detective.classify(silence_audio, sample_rate=16000)
 
     assert result["raw"]["empty_cat"] == 0.0
     assert not np.isnan(result["raw"]["empty_cat"])
 
 
-@patch("ai.ai_runtime.detection.semantic_detective.hub.load", return_value=FakeYamnet())
-def test_invalid_category_indices_raises(mock_load, tmp_path: Path):
+def test_invalid_category_indices_raises(fake_hub, edge_case_maps):
     """Test that out-of-range YAMNet indices (>520) raise ValueError."""
-    yaml_content = """\
-categories:
-  bad_cat:
-    indices: [521]
-    priority: low
-"""
-    path = tmp_path / "bad_map.yaml"
-    path.write_text(yaml_content)
-
     with pytest.raises(ValueError, match="invalid YAMNet indices"):
-        SemanticDetective(class_map_path=path)
+        SemanticDetective(class_map_path=edge_case_maps["bad"])
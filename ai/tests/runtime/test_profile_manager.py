@@ -0,0 +1,112 @@
+"""ProfileManager CRUD and caching tests."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai.ai_runtime.profiles import AutoTrigger, ControlEngine, ProfileManager
+
+pytestmark = pytest.mark.xdist_group("profiles")
+
+
+def test_get_all_profiles_snapshot_tracks_create_and_delete(tmp_path):
+    manager = ProfileManager(profiles_dir=tmp_path / "profiles")
+    before = manager.get_all_profiles()
+    assert manager.get_all_profiles() is before
+
+    profile = manager.create_profile(name="Typing", suppressions={"typing": True})
+    after_create = manager.get_all_profiles()
+    assert after_create is not before
+    assert profile in after_create
+    assert len(after_create) == len(before) + 1
+
+    manager.delete_profile(profile.id)
+    after_delete = manager.get_all_profiles()
+    assert profile not in after_delete
+    assert [p.id for p in after_delete] == [p.id for p in before]
+
+
+def test_trigger_table_scores_and_auto_mode_selection(tmp_path):
+    manager = ProfileManager(profiles_dir=tmp_path / "profiles")
+    engine = ControlEngine(profile_manager=manager, suppressor=MagicMock(spec=["suppress"]))
+    table = manager.get_trigger_table()
+    assert manager.get_trigger_table() is table
+
+    # Below every threshold nothing is selected.
+    assert engine._evaluate_auto_mode({"typing": 0.4}) is None
+
+    # default-focus (typing >= 0.6) is listed before default-office (typing >= 0.5);
+    # both score 0.7, so the first one wins like the old sequential scan.
+    assert engine._evaluate_auto_mode({"typing": 0.7}).id == "default-focus"
+    assert engine._evaluate_auto_mode({"typing": 0.55}).id == "default-office"
+
+    combo = manager.create_profile(
+        name="Typing in traffic",
+        auto_triggers=[AutoTrigger("typing", 0.5), AutoTrigger("traffic", 0.5)],
+    )
+    assert manager.get_trigger_table() is not table
+    assert engine._evaluate_auto_mode({"typing": 0.7, "traffic": 0.6}) is combo
+
+    manager.update_profile(combo.id, auto_triggers=[AutoTrigger("wind", 0.5)])
+    assert engine._evaluate_auto_mode({"typing": 0.7, "traffic": 0.6}).id == "default-focus"
+
+    # Any update or flush rebuilds the table, not just trigger edits
+    table = manager.get_trigger_table()
+    manager.update_profile(combo.id, name="Renamed")
+    assert manager.get_trigger_table() is not table
+    table = manager.get_trigger_table()
+    manager.flush()
+    assert manager.get_trigger_table() is not table
+
+
+def test_system_and_user_profile_snapshots(tmp_path):
+    manager = ProfileManager(profiles_dir=tmp_path / "profiles")
+    system = manager.get_system_profiles()
+    assert manager.get_system_profiles() is system
+    assert manager.get_user_profiles() == ()
+    assert manager.get_profile("default-commute") in system
+
+    profile = manager.create_profile(name="Mine")
+    assert manager.get_user_profiles() == (profile,)
+    assert manager.get_system_profiles() == system
+
+
+def test_default_profiles_dir_uses_platform_data_dir(tmp_path, monkeypatch):
+    # Patch the name profile_manager imported, for the whole test (not just a with-block).
+    monkeypatch.setattr(
+        "ai.ai_runtime.profiles.profile_manager.user_data_dir",
+        lambda *args, **kwargs: str(tmp_path),
+    )
+    manager = ProfileManager()
+    assert manager.profiles_dir == tmp_path / "profiles"
+
+    profile = manager.create_profile(name="Persisted")
+    assert (tmp_path / "profiles" / f"{profile.id}.json").exists()
+    assert ProfileManager().get_profile(profile.id) is not None
+
+
+def test_batch_updates_defers_writes_until_exit(tmp_path, monkeypatch):
+    manager = ProfileManager(profiles_dir=tmp_path / "profiles")
+    writes = []
+    write_profile = manager._write_profile
+    monkeypatch.setattr(manager, "_write_profile", lambda p: (writes.append(p.id), write_profile(p)))
+
+    with manager.batch_updates():
+        profile = manager.create_profile(name="Draft")
+        manager.update_profile(profile.id, name="Renamed")
+        manager.update_profile(profile.id, gains={"speech": 1.0, "noise": 0.2, "events": 0.5})
+        scratch = manager.create_profile(name="Scratch")
+        manager.delete_profile(scratch.id)
+        assert writes == []
+        assert not (tmp_path / "profiles" / f"{profile.id}.json").exists()
+
+    assert writes == [profile.id]
+    reloaded = ProfileManager(profiles_dir=tmp_path / "profiles").get_profile(profile.id)
+    assert reloaded.name == "Renamed"
+    assert reloaded.gains["noise"] == 0.2
+    assert not (tmp_path / "profiles" / f"{scratch.id}.json").exists()
+
+    manager.update_profile(profile.id, name="Direct")
+    assert writes == [profile.id, profile.id]
@@ -0,0 +1,39 @@
+"""Smoke tests for the legacy full-window Waveformer ONNX exporter."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from ai.ai_runtime.separation import WaveformerSeparator  # noqa: E402
+from ai.export.export_onnx import ONNXExporter  # noqa: E402
+
+pytestmark = pytest.mark.xdist_group("waveformer")
+
+
+@pytest.fixture(scope="session")
+def onnx_exporter():
+    return ONNXExporter(WaveformerSeparator(device="cpu", compile_model=False))
+
+
+@pytest.fixture(scope="session")
+def exported_onnx(onnx_exporter, tmp_path_factory):
+    # Export + checker is seconds of work; every test below reads the same file.
+    out = tmp_path_factory.mktemp("onnx") / "waveformer.onnx"
+    return onnx_exporter.export(out, use_fp16=False)
+
+
+def test_exported_onnx_io_names(exported_onnx):
+    model = onnx.load(str(exported_onnx))
+    assert [i.name for i in model.graph.input] == ["audio_input", "query_vector"]
+    assert [o.name for o in model.graph.output] == ["separated_audio"]
+
+
+def test_exported_onnx_matches_pytorch(onnx_exporter, exported_onnx):
+    audio = np.random.default_rng(0).standard_normal(44_100, dtype=np.float32)
+    metrics = onnx_exporter.validate(exported_onnx, audio, 44_100)
+    assert metrics["mse"] < 0.01
+    assert metrics["correlation"] > 0.99
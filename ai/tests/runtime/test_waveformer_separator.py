@@ -1,3 +1,5 @@
+import warnings
+
 import numpy as np
 import pytest
 import torch
@@ -8,6 +10,19 @@ from ai.ai_runtime.utils.paths import get_waveformer_checkpoint_path, get_wavefo
 CONFIG = get_waveformer_config_path()
 CKPT = get_waveformer_checkpoint_path()
 
+pytestmark = pytest.mark.xdist_group("waveformer")
+
+# Read-only inputs shared by every test; clone before mutating.
+_AUDIO160 = np.zeros(160, dtype=np.float32)
+_AUDIO80 = np.zeros(80, dtype=np.float32)
+_QVEC = torch.zeros(len(TARGETS), dtype=torch.float32)
+
+
+@pytest.fixture(scope="module")
+def cpu_sep():
+    # separate() never touches the weights, so one checkpoint load serves the whole module.
+    return WaveformerSeparator(config_path=CONFIG, checkpoint_path=CKPT, device="cpu")
+
 
 def test_missing_assets_error(monkeypatch):
     bad_config = CONFIG.parent / "missing_config.json"
@@ -15,27 +30,55 @@ def test_missing_assets_error(monkeypatch):
         WaveformerSeparator(config_path=bad_config, checkpoint_path=CKPT)
 
 
-def test_invalid_target_error():
-    sep = WaveformerSeparator(config_path=CONFIG, checkpoint_path=CKPT, device="cpu")
-    audio = np.zeros((160,), dtype=np.float32)
+def test_invalid_target_error(cpu_sep):
+    audio = _AUDIO160
     with pytest.raises(ValueError):
-        sep.separate(audio, sample_rate=16_000, targets=["not_a_target"])
+        cpu_sep.separate(audio, sample_rate=16_000, targets=["not_a_target"])
 
 
-def test_resample_and_shape_cpu():
-    sep = WaveformerSeparator(config_path=CONFIG, checkpoint_path=CKPT, device="cpu")
-    audio = np.zeros((160,), dtype=np.float32)
-    out = sep.separate(audio, sample_rate=16_000, targets=TARGETS[:1])
+def test_resample_and_shape_cpu(cpu_sep):
+    audio = _AUDIO160
+    out = cpu_sep.separate(audio, sample_rate=16_000, targets=TARGETS[:1])
     assert out.shape[0] == audio.shape[0]
     assert out.ndim == 2
 
 
-def test_query_vector_list_and_tensor():
-    sep = WaveformerSeparator(config_path=CONFIG, checkpoint_path=CKPT, device="cpu")
-    audio = np.zeros((80,), dtype=np.float32)
-    out_list = sep.separate(audio, sample_rate=44_100, targets=TARGETS[:2])
+def test_query_vector_list_and_tensor(cpu_sep):
+    audio = _AUDIO80
+    out_list = cpu_sep.separate(audio, sample_rate=44_100, targets=TARGETS[:2])
     assert out_list.shape[0] == audio.shape[0]
-    vec = torch.zeros(len(TARGETS), dtype=torch.float32)
+    vec = _QVEC.clone()
     vec[0] = 1.0
-    out_tensor = sep.separate(audio, sample_rate=44_100, targets=vec)
+    out_tensor = cpu_sep.separate(audio, sample_rate=44_100, targets=vec)
     assert out_tensor.shape[0] == audio.shape[0]
+
+
+def test_chunked_separate_keeps_length(cpu_sep):
+    audio = np.zeros(3 * 44_100 + 17, dtype=np.float32)
+    out = cpu_sep.separate(audio, sample_rate=44_100, targets=TARGETS[:1], chunk_seconds=1.0)
+    assert out.shape == (audio.shape[0], 1)
+    with pytest.raises(ValueError):
+        cpu_sep.separate(audio, sample_rate=44_100, chunk_seconds=1.0, overlap=1.0)
+
+
+@pytest.mark.parametrize("overlap", [0.0, 0.25, 0.5, 0.75])
+def test_forward_chunked_overlap_add_is_identity(overlap):
+    # With an identity model, fading and weight normalisation must reconstruct the input exactly
+    sep = object.__new__(WaveformerSeparator)
+    sep.device = torch.device("cpu")
+    sep._amp_dtype = None
+    sep.model = lambda audio, query: audio
+    mixture = torch.randn(1, 1, 2_000, generator=torch.Generator().manual_seed(0))
+    out = sep._forward_chunked(mixture, _QVEC.unsqueeze(0), chunk_seconds=0.01, overlap=overlap)
+    torch.testing.assert_close(out, mixture[0])
+
+
+def test_read_only_input_is_copied():
+    # np.frombuffer over bytes is read-only; wrapping it would warn and alias the caller's buffer
+    audio = np.frombuffer(np.arange(160, dtype=np.float32).tobytes(), dtype=np.float32)
+    sep = object.__new__(WaveformerSeparator)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        mixture = sep._to_channel_first(audio)
+    assert not np.shares_memory(mixture.numpy(), audio)
+    torch.testing.assert_close(mixture, torch.from_numpy(audio.copy()).unsqueeze(0))